@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+# Sync-only middleware would adapt the whole handler, see DEBUG_TOOLBAR.
+os.environ["DEBUG_TOOLBAR"] = "false"
 
 application = get_asgi_application()
@@ -16,6 +16,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Connect the task metrics signal handlers.
+from app import task_metrics  # noqa: E402, F401
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PIN_PREFIX = "db-pin"
+
+# Read right after they are written by another request of the same client
+# (login, logout, token rotation), and cached in front of the database.
+PRIMARY_MODELS = {"authtoken.token", "sessions.session"}
+
+# Seconds the replica is behind, 0 when it replayed everything it received.
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery()
+        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class RequestRouting:
+    def __init__(self, replica_reads: bool):
+        self.replica_reads = replica_reads
+        self.wrote = False
+        # Chosen on the first read, every read of the request then sees
+        # the same replica.
+        self.replica = None
+        self.replica_chosen = False
+        self.read_from_replica = False
+
+    def choose_replica(self):
+        if not self.replica_chosen:
+            self.replica = replica_pool.choose()
+            self.replica_chosen = True
+        return self.replica
+
+
+# Set by ReplicaRoutingMiddleware, also seen by its sync_to_async calls.
+# Code outside requests (tasks, commands) always uses the primary.
+current_routing = ContextVar("current_routing", default=None)
+
+
+def replica_lag(connection) -> float:
+    """Seconds ``connection`` is behind its primary."""
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        (lag,) = cursor.fetchone()
+    return float("inf") if lag is None else float(lag)
+
+
+class ReplicaPool:
+    """
+    Picks a replica among those that answered their last check and were
+    at most ``REPLICA_MAX_LAG`` seconds behind. Every process checks each
+    replica once per ``REPLICA_CHECK_INTERVAL`` seconds.
+    """
+
+    def __init__(self):
+        self._checks = {}
+
+    def reset(self) -> None:
+        """Forget the last checks, the next reads check every replica."""
+        self._checks.clear()
+
+    def choose(self):
+        aliases = [
+            alias
+            for alias in settings.DATABASE_REPLICAS
+            if self.is_available(alias)
+        ]
+        return random.choice(aliases) if aliases else None
+
+    def is_available(self, alias: str) -> bool:
+        now = time.monotonic()
+        checked_at, available = self._checks.get(alias, (None, False))
+        if (
+            checked_at is None
+            or now - checked_at >= settings.REPLICA_CHECK_INTERVAL
+        ):
+            available = self.check(alias)
+            self._checks[alias] = (now, available)
+        return available
+
+    @staticmethod
+    def check(alias: str) -> bool:
+        connection = connections[alias]
+        try:
+            lag = replica_lag(connection)
+        except DatabaseError:
+            logger.warning("Replica %s is unavailable", alias, exc_info=True)
+            connection.close()
+            return False
+
+        if lag > settings.REPLICA_MAX_LAG:
+            logger.warning("Replica %s is %.1fs behind", alias, lag)
+            return False
+        return True
+
+
+replica_pool = ReplicaPool()
+
+
+class ReplicaRouter:
+    """
+    Send reads of safe-method requests to a replica and everything else
+    to the primary. Once a request wrote, its later reads stay on the
+    primary as well.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if (
+            routing is None
+            or not routing.replica_reads
+            or routing.wrote
+            or model._meta.label_lower in PRIMARY_MODELS
+        ):
+            return DEFAULT_DB_ALIAS
+
+        replica = routing.choose_replica()
+        if replica is None:
+            return DEFAULT_DB_ALIAS
+        routing.read_from_replica = True
+        return replica
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_from_replica() -> bool:
+    """Whether the current request read rows from a replica."""
+    routing = current_routing.get()
+    return routing is not None and routing.read_from_replica
+
+
+def pin_key(request):
+    """
+    Cache key of the client the request came from, by its token or
+    session, ``None`` for anonymous clients.
+    """
+    credentials = request.headers.get("Authorization")
+    if not credentials:
+        credentials = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f"{PIN_PREFIX}:{digest}"
+
+
+def get_pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let GET, HEAD and OPTIONS requests read from the replicas, unless the
+    same client wrote in the last ``REPLICA_PIN_SECONDS``: a client sees
+    its own likes, comments and posts even when the replicas lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = pin_key(request)
+        pinned = key is not None and get_pin_cache().get(key) is not None
+        routing = RequestRouting(
+            request.method in SAFE_METHODS and not pinned
+        )
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+        if key is not None and self.should_pin(request, response, routing):
+            get_pin_cache().set(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = pin_key(request)
+        pinned = key is not None and (
+            await get_pin_cache().aget(key) is not None
+        )
+        routing = RequestRouting(
+            request.method in SAFE_METHODS and not pinned
+        )
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+        if key is not None and self.should_pin(request, response, routing):
+            await get_pin_cache().aset(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def should_pin(request, response, routing) -> bool:
+        # Raw SQL writes skip the router, count every accepted write.
+        return routing.wrote or (
+            request.method not in SAFE_METHODS and response.status_code < 400
+        )
@@ -0,0 +1,221 @@
+import os
+import time
+from contextvars import ContextVar
+from secrets import compare_digest
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework import serializers
+
+from app.task_metrics import queue_depth
+
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 100)
+SIZE_BUCKETS = tuple(2**power for power in range(7, 24, 2))
+
+request_duration = Histogram(
+    "api_request_duration_seconds",
+    "Time to respond to a request, by view action.",
+    ["view", "method", "status"],
+)
+request_queries = Histogram(
+    "api_request_db_queries",
+    "Database queries run by a request.",
+    ["view"],
+    buckets=QUERY_BUCKETS,
+)
+request_db_duration = Histogram(
+    "api_request_db_duration_seconds",
+    "Time a request spent in database queries.",
+    ["view"],
+)
+serializer_duration = Histogram(
+    "api_serializer_duration_seconds",
+    "Time a request spent in serializer to_representation().",
+    ["view"],
+)
+response_size = Histogram(
+    "api_response_size_bytes",
+    "Size of the response body.",
+    ["view"],
+    buckets=SIZE_BUCKETS,
+)
+throttled_requests = Counter(
+    "api_throttled_requests_total",
+    "Requests rejected by a throttle.",
+    ["view", "scope"],
+)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+
+# Set for the duration of a request, also seen by its sync_to_async calls.
+current_stats = ContextVar("current_stats", default=None)
+
+
+def view_label(view, method: str) -> str:
+    """``ClassName.action`` of a DRF view, ``ClassName.method`` otherwise."""
+    action = getattr(view, "action", None) or method.lower()
+    return f"{type(view).__name__}.{action}"
+
+
+def resolved_view_label(request) -> str:
+    """``view_label()`` of the view the request's URL resolved to."""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+
+    func = match.func
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if cls is None:
+        return f"{func.__name__}.{request.method.lower()}"
+    action = getattr(func, "actions", {}).get(request.method.lower())
+    return f"{cls.__name__}.{action or request.method.lower()}"
+
+
+def instrument_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrument_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+class TimedSerializerMixin:
+    """Count the time of top-level representations as serializer time."""
+
+    def to_representation(self, instance):
+        stats = current_stats.get()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if stats is None or parent is not None:
+            return super().to_representation(instance)
+
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+
+
+class PrometheusMiddleware:
+    """
+    Export latency, database queries and time, serializer time and
+    response size of every request, labelled by view action.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def observe(request, response, stats, duration: float) -> None:
+        view = resolved_view_label(request)
+        request_duration.labels(
+            view, request.method, response.status_code
+        ).observe(duration)
+        request_queries.labels(view).observe(stats.queries)
+        request_db_duration.labels(view).observe(stats.db_time)
+        if stats.serializer_time:
+            serializer_duration.labels(view).observe(stats.serializer_time)
+        if not response.streaming:
+            response_size.labels(view).observe(len(response.content))
+
+
+def metrics_registry(queue_depths: bool = False):
+    """
+    The default registry, or with ``PROMETHEUS_MULTIPROC_DIR`` set, one
+    that merges the metrics of every worker process.
+
+    Queue depths are read from the broker on every scrape, only the
+    Celery workers' metrics server asks for them.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    if queue_depths:
+        registry.register(queue_depth)
+    return registry
+
+
+def is_metrics_client(request) -> bool:
+    """
+    Clients of ``METRICS_ALLOWED_IPS``, or sending ``METRICS_TOKEN`` as a
+    bearer token when one is set.
+    """
+    if settings.METRICS_TOKEN and compare_digest(
+        request.headers.get("Authorization", ""),
+        f"Bearer {settings.METRICS_TOKEN}",
+    ):
+        return True
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST
+    )
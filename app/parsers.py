@@ -0,0 +1,45 @@
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from app.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+
+
+class ORJSONParser(BaseParser):
+    """Parses JSON request bodies with orjson."""
+
+    media_type = "application/json"
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        content = stream.read() if stream is not None else b""
+        if codecs.lookup(encoding).name != "utf-8":
+            content = content.decode(encoding)
+
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses ``application/msgpack`` request bodies, requires the optional
+    ``msgpack`` package.
+    """
+
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        content = stream.read() if stream is not None else b""
+        try:
+            return msgpack.unpackb(content, raw=False)
+        except ValueError as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,62 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    # Let DRF's encoder format dates so output matches JSONRenderer.
+    | orjson.OPT_PASSTHROUGH_DATETIME
+)
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    Types without a native encoding: datetimes, decimals, lazy strings,
+    querysets and the rest of what DRF's ``JSONEncoder`` supports.
+    """
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with the same output, encoded by orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        options = ORJSON_OPTIONS
+        # orjson only indents by two spaces, any indent pretty prints.
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+
+        content = orjson.dumps(data, default=encode_default, option=options)
+        # Escaped like JSONRenderer does, to output a strict JavaScript
+        # subset.
+        return content.replace(
+            "\u2028".encode(), b"\\u2028"
+        ).replace("\u2029".encode(), b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders MessagePack for clients that ask for ``application/msgpack``,
+    requires the optional ``msgpack`` package.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -10,7 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
+
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,9 +30,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DJANGO_DEBUG", "false").lower() == "true"
+
+ALLOWED_HOSTS = os.environ.get(
+    "DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1"
+).split(",")
 
-ALLOWED_HOSTS = []
+# The toolbar middleware is sync-only: in the ASGI stack it would run
+# every async view through a thread, app/asgi.py turns it off there.
+DEBUG_TOOLBAR = (
+    DEBUG and os.environ.get("DEBUG_TOOLBAR", "true").lower() == "true"
+)
 
 
 # Application definition
@@ -40,26 +52,36 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "drf_spectacular",
-    "debug_toolbar",
     "django_celery_beat",
     "social_media",
     "user",
 ]
 
 MIDDLEWARE = [
+    "app.metrics.PrometheusMiddleware",
+    "app.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.throttling.RateLimitHeadersMiddleware",
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware")
+        + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 ROOT_URLCONF = "app.urls"
 
 TEMPLATES = [
@@ -95,6 +117,37 @@ DATABASES = {
     }
 }
 
+# Read replicas, "host:port" separated by commas, with the other settings
+# of the primary (ex. POSTGRES_REPLICAS=db-replica:5432). Reads of GET,
+# HEAD and OPTIONS requests go to them, see app/db_router.py. In tests
+# they mirror the primary test database.
+DATABASE_REPLICAS = []
+for index, address in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICAS", "").split(","))
+):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        # Give up quickly on a replica that is down.
+        "OPTIONS": {"connect_timeout": 2},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["app.db_router.ReplicaRouter"]
+
+# Clients read from the primary for this long after they wrote
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+REPLICA_PIN_CACHE_ALIAS = "default"
+# Replicas further behind are skipped, every process checks them at this
+# interval. Responses read from a replica are only cached once their
+# resources have not changed for REPLICA_MAX_LAG seconds.
+REPLICA_MAX_LAG = int(os.environ.get("REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = int(os.environ.get("REPLICA_CHECK_INTERVAL", 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -136,6 +189,24 @@ STATIC_URL = "static/"
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
 
+# Uploads are hashed while they stream in and stored once per content
+STORAGES = {
+    "default": {
+        "BACKEND": "social_media.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+FILE_UPLOAD_HANDLERS = [
+    "social_media.storage.HashingMemoryFileUploadHandler",
+    "social_media.storage.HashingTemporaryFileUploadHandler",
+]
+# Unreferenced media blobs are deleted after this many seconds
+MEDIA_BLOB_GRACE_PERIOD = int(
+    os.environ.get("MEDIA_BLOB_GRACE_PERIOD", 24 * 60 * 60)
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -147,18 +218,45 @@ INTERNAL_IPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "user.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "app.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "app.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "app.throttling.AnonThrottle",
+        "app.throttling.UserThrottle",
+        "app.throttling.ScopedThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "25/min", "user": "300/min"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "25/min",
+        "user": "300/min",
+        "login": "10/min",
+        "register": "5/hour",
+        "post_create": "30/hour",
+        "like": "120/min",
+        "follow": "60/min",
+    },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# MessagePack for internal services, with the optional msgpack package.
+if find_spec("msgpack") is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+        "app.renderers.MessagePackRenderer"
+    )
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append(
+        "app.parsers.MessagePackParser"
+    )
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Social Media API",
     "DESCRIPTION": "Test task building a RESTful API for a social media platform.",
@@ -177,3 +275,104 @@ CELERY_RESULT_BACKEND = os.environ["CELERY_RESULT_BACKEND"]
 CELERY_TIMEZONE = os.environ["TZ"]
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    "trim-timelines": {
+        "task": "social_media.tasks.trim_timelines",
+        "schedule": crontab(minute=0, hour="*/6"),
+    },
+    "reconcile-counters": {
+        "task": "social_media.tasks.reconcile_stored_counters",
+        "schedule": crontab(minute=30),
+    },
+    "collect-media-blobs": {
+        "task": "social_media.tasks.collect_media_blobs",
+        "schedule": crontab(minute=45),
+    },
+    "publish-scheduled-posts": {
+        "task": "social_media.tasks.publish_scheduled_posts",
+        "schedule": timedelta(
+            seconds=int(os.environ.get("SCHEDULED_POSTS_INTERVAL", 10))
+        ),
+    },
+}
+
+# Due scheduled posts are claimed and published in batches of this size
+SCHEDULED_POSTS_BATCH_SIZE = int(
+    os.environ.get("SCHEDULED_POSTS_BATCH_SIZE", 500)
+)
+
+# Celery workers serve their task metrics on this port, 0 disables it
+TASK_METRICS_PORT = int(os.environ.get("TASK_METRICS_PORT", 0))
+
+# Clients allowed to read /metrics, by REMOTE_ADDR (the proxy's address
+# behind one), or sending "Authorization: Bearer <METRICS_TOKEN>" when set
+METRICS_ALLOWED_IPS = os.environ.get(
+    "METRICS_ALLOWED_IPS", "127.0.0.1"
+).split(",")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Home timeline (fan-out on write)
+# Authors with more followers than the limit are not fanned out,
+# their posts are merged into the feed at read time.
+TIMELINE_FANOUT_LIMIT = int(os.environ.get("TIMELINE_FANOUT_LIMIT", 5000))
+TIMELINE_MAX_LENGTH = int(os.environ.get("TIMELINE_MAX_LENGTH", 800))
+TIMELINE_BACKFILL_SIZE = int(os.environ.get("TIMELINE_BACKFILL_SIZE", 50))
+
+# Optional Redis adjacency cache for follow relationship checks
+FOLLOW_GRAPH_REDIS_URL = os.environ.get("FOLLOW_GRAPH_REDIS_URL")
+FOLLOW_GRAPH_CACHE_TIMEOUT = int(
+    os.environ.get("FOLLOW_GRAPH_CACHE_TIMEOUT", 24 * 60 * 60)
+)
+
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+    # Per-process tier in front of the shared cache
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "local",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Rate limits are kept in Redis when set, in the default cache otherwise
+THROTTLE_REDIS_URL = os.environ.get("THROTTLE_REDIS_URL", CACHE_REDIS_URL)
+
+# Cached GET responses, invalidated by versioning the resources they were
+# built from. Counters of other users' likes and comments shown in feeds
+# may lag by up to the timeout. Endpoints are "<basename>-<action>"
+# (ex. RESPONSE_CACHE_DISABLED_ENDPOINTS=post-list,profile-retrieve).
+RESPONSE_CACHE_ENABLED = (
+    os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 30))
+RESPONSE_CACHE_DISABLED_ENDPOINTS = [
+    endpoint.strip()
+    for endpoint in os.environ.get(
+        "RESPONSE_CACHE_DISABLED_ENDPOINTS", ""
+    ).split(",")
+    if endpoint.strip()
+]
+
+# Tokens are resolved from a per-process cache, then the shared cache,
+# before the database. Logout, rotation and user changes drop them from the
+# shared cache at once and mark them revoked there for
+# TOKEN_LOCAL_CACHE_TIMEOUT seconds, so other processes stop trusting
+# their local copies. A local hit costs that one shared cache read.
+TOKEN_CACHE_ALIAS = "default"
+TOKEN_CACHE_TIMEOUT = int(os.environ.get("TOKEN_CACHE_TIMEOUT", 60))
+TOKEN_LOCAL_CACHE_ALIAS = "local"
+TOKEN_LOCAL_CACHE_TIMEOUT = int(
+    os.environ.get("TOKEN_LOCAL_CACHE_TIMEOUT", 2)
+)
+# Tokens older than this are rejected and replaced on the next login,
+# 0 disables expiry
+TOKEN_EXPIRE_SECONDS = int(os.environ.get("TOKEN_EXPIRE_SECONDS", 0))
@@ -0,0 +1,192 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from celery import current_app
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_shutdown,
+    worker_ready,
+)
+from kombu.serialization import dumps
+from prometheus_client import (
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+SIZE_BUCKETS = tuple(2**power for power in range(6, 23, 2))
+SENT_AT_HEADER = "sent_at"
+
+task_duration = Histogram(
+    "celery_task_duration_seconds",
+    "Time a task took to run, by final state.",
+    ["task", "state"],
+)
+task_lag = Histogram(
+    "celery_task_lag_seconds",
+    "Delay between the ETA of a task, or when it was sent without one, "
+    "and the start of its run.",
+    ["task"],
+    buckets=LAG_BUCKETS,
+)
+task_retries = Counter(
+    "celery_task_retries_total", "Task retries.", ["task"]
+)
+task_failures = Counter(
+    "celery_task_failures_total",
+    "Tasks that raised, by exception type.",
+    ["task", "exception"],
+)
+task_payload_size = Histogram(
+    "celery_task_payload_bytes",
+    "Serialized size of the arguments of published tasks.",
+    ["task"],
+    buckets=SIZE_BUCKETS,
+)
+
+# Run start times by task id, for the task_postrun handler.
+_started = {}
+
+
+@before_task_publish.connect
+def record_publish(sender=None, body=None, headers=None, **kwargs):
+    if headers is not None:
+        headers[SENT_AT_HEADER] = time.time()
+
+    _, _, payload = dumps(body, serializer=current_app.conf.task_serializer)
+    task_payload_size.labels(sender).observe(len(payload))
+
+
+def task_lag_seconds(request):
+    """Seconds between the ETA, or the publish time, and now."""
+    if request.eta:
+        eta = request.eta
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        if eta.tzinfo is None:
+            eta = eta.replace(tzinfo=timezone.utc)
+        return time.time() - eta.timestamp()
+
+    sent_at = getattr(request, SENT_AT_HEADER, None)
+    if sent_at is None:
+        return None
+    return time.time() - sent_at
+
+
+@task_prerun.connect
+def record_start(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+
+    lag = task_lag_seconds(task.request)
+    task.request.metrics_lag = lag
+    if lag is not None:
+        task_lag.labels(task.name).observe(max(lag, 0))
+
+
+@task_postrun.connect
+def record_run(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+
+    duration = time.perf_counter() - started
+    task_duration.labels(task.name, state or "UNKNOWN").observe(duration)
+
+    request = task.request
+    lag = getattr(request, "metrics_lag", None)
+    timing = {
+        "task": task.name,
+        "task_id": task_id,
+        "state": state,
+        "runtime": round(duration, 6),
+        "lag": None if lag is None else round(lag, 6),
+        "queue": (request.delivery_info or {}).get("routing_key"),
+        "retries": request.retries,
+    }
+    logger.info(
+        " ".join(f"{key}=%s" for key in timing),
+        *timing.values(),
+        extra={"task_timing": timing},
+    )
+
+
+@task_retry.connect
+def record_retry(sender=None, **kwargs):
+    task_retries.labels(sender.name).inc()
+
+
+@task_failure.connect
+def record_failure(sender=None, exception=None, **kwargs):
+    task_failures.labels(sender.name, type(exception).__name__).inc()
+
+
+class QueueDepthCollector:
+    """Messages waiting in each known queue, read from the broker."""
+
+    def describe(self):
+        # Without it, registering calls collect() and so connects to the
+        # broker at import time.
+        return []
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "celery_queue_depth",
+            "Messages waiting in the queue.",
+            labels=["queue"],
+        )
+        app = current_app
+        try:
+            with app.connection_for_read() as connection:
+                connection.ensure_connection(max_retries=1)
+                for queue in app.amqp.queues:
+                    depth.add_metric([queue], self.size(connection, queue))
+        except Exception:
+            # Opening, using or releasing the connection can raise any of
+            # the transport's errors; a scrape must not fail on them.
+            logger.warning("Could not read queue depths", exc_info=True)
+        yield depth
+
+    @staticmethod
+    def size(connection, queue: str) -> int:
+        channel = connection.channel()
+        try:
+            _, count, _ = channel.queue_declare(queue, passive=True)
+        except connection.channel_errors:
+            # Not declared yet, nothing was sent to it.
+            return 0
+        finally:
+            channel.close()
+        return count
+
+
+queue_depth = QueueDepthCollector()
+
+
+@worker_ready.connect
+def serve_worker_metrics(**kwargs):
+    from django.conf import settings
+
+    from app.metrics import metrics_registry
+
+    if settings.TASK_METRICS_PORT:
+        start_http_server(
+            settings.TASK_METRICS_PORT,
+            registry=metrics_registry(queue_depths=True),
+        )
+
+
+@worker_process_shutdown.connect
+def forget_worker_process(pid=None, **kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,202 @@
+import logging
+import math
+import time
+from functools import lru_cache
+
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from app.metrics import throttled_requests, view_label
+
+logger = logging.getLogger(__name__)
+
+# Generic cell rate algorithm: a single "theoretical arrival time" per key
+# allows ``limit`` requests per period with bursts, in one atomic call.
+# Returns {allowed, remaining, retry after ms, reset after ms}.
+GCRA_SCRIPT = """
+local now_parts = redis.call("TIME")
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local interval = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+local allow_at = new_tat - limit * interval
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+return {1, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+
+
+@lru_cache(maxsize=None)
+def _script_for(url: str):
+    return redis.Redis.from_url(url).register_script(GCRA_SCRIPT)
+
+
+def get_throttle_script():
+    """The registered GCRA script, or ``None`` when Redis is not set up."""
+    if not settings.THROTTLE_REDIS_URL:
+        return None
+    return _script_for(settings.THROTTLE_REDIS_URL)
+
+
+class RedisRateThrottle(SimpleRateThrottle):
+    """
+    Rate throttle shared by every worker, checked and updated by a single
+    Lua script.
+
+    Without ``THROTTLE_REDIS_URL`` the same algorithm runs against the
+    default cache, which is only suitable for development.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = math.ceil(self.duration * 1000 / self.num_requests)
+        script = get_throttle_script()
+        try:
+            if script is None:
+                result = self.check_in_cache(interval)
+            else:
+                result = script(
+                    keys=[self.key], args=[interval, self.num_requests]
+                )
+        except redis.RedisError:
+            logger.warning("Rate limit check failed", exc_info=True)
+            return True
+
+        allowed, remaining, retry_after, reset_after = map(int, result)
+        self.retry_after = retry_after / 1000
+        record_rate_limit(
+            request, self.num_requests, remaining, reset_after / 1000
+        )
+        if not allowed:
+            throttled_requests.labels(
+                view_label(view, request.method), self.scope
+            ).inc()
+        return bool(allowed)
+
+    def check_in_cache(self, interval: int):
+        now = int(time.time() * 1000)
+        tat = max(self.cache.get(self.key, now), now)
+        new_tat = tat + interval
+        allow_at = new_tat - self.num_requests * interval
+        if allow_at > now:
+            return 0, 0, allow_at - now, tat - now
+
+        self.cache.set(self.key, new_tat, math.ceil((new_tat - now) / 1000))
+        return 1, (now - allow_at) // interval, 0, new_tat - now
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonThrottle(RedisRateThrottle):
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UserThrottle(RedisRateThrottle):
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ScopedThrottle(RedisRateThrottle):
+    """
+    Throttle by ``view.throttle_scope``, or on viewsets by the scope of the
+    current action in ``view.throttle_scopes``.
+    """
+
+    def __init__(self):
+        # The scope, and so the rate, depends on the view.
+        pass
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, "throttle_scopes", {})
+        self.scope = scopes.get(getattr(view, "action", None)) or getattr(
+            view, "throttle_scope", None
+        )
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+def record_rate_limit(request, limit, remaining, reset) -> None:
+    """Keep the most restrictive limit of the request for its headers."""
+    http_request = getattr(request, "_request", request)
+    current = getattr(http_request, "rate_limit", None)
+    if current is None or remaining < current[1]:
+        http_request.rate_limit = (limit, remaining, reset)
+
+
+class RateLimitHeadersMiddleware:
+    """Add ``RateLimit-*`` headers to throttled API responses."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    @staticmethod
+    def add_headers(request, response):
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            limit, remaining, reset = rate_limit
+            response["RateLimit-Limit"] = str(limit)
+            response["RateLimit-Remaining"] = str(remaining)
+            response["RateLimit-Reset"] = str(math.ceil(reset))
+
+        return response
@@ -24,6 +24,7 @@ from drf_spectacular.views import (
 )
 
 from app import settings
+from app.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -31,7 +32,7 @@ urlpatterns = [
         "api/social/", include("social_media.urls", namespace="social_media")
     ),
     path("api/user/", include("user.urls", namespace="user")),
-    path("__debug__/", include("debug_toolbar.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("api/doc/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
@@ -44,3 +45,6 @@ urlpatterns = [
         name="redoc",
     ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.DEBUG_TOOLBAR:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
@@ -0,0 +1,3 @@
+#!/bin/sh
+# Let the local replica (docker-compose.replica.yml) stream from the primary.
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -4,12 +4,15 @@ from social_media.models import (
     Profile,
     Post,
     Comment,
-    Like
+    Like,
+    Hashtag,
+    ScheduledPost,
 )
 
 # Register your models here.
 admin.site.register(Profile)
 admin.site.register(Like)
+admin.site.register(Hashtag)
 
 
 @admin.register(Post)
@@ -37,3 +40,13 @@ class CommentAdmin(admin.ModelAdmin):
         return obj.owner.full_name if obj.owner else None
 
     get_owner_full_name.short_description = "Owner Full Name"
+
+
+@admin.register(ScheduledPost)
+class ScheduledPostAdmin(admin.ModelAdmin):
+    list_display = [
+        "owner",
+        "text",
+        "publish_at",
+    ]
+    list_filter = ["owner"]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SocialMediaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "social_media"
+
+    def ready(self):
+        # Instrument every database connection, including the first one.
+        import app.metrics  # noqa: F401
+        import social_media.signals  # noqa: F401
@@ -0,0 +1,174 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from app.renderers import ORJSONRenderer
+from social_media.filters import (
+    filter_posts,
+    filter_profiles,
+    is_filtered_post_list,
+)
+from social_media.likes import aliked_post_ids
+from social_media.models import Post, Profile
+from social_media.pagination import (
+    AsyncLimitOffsetPagination,
+    KeysetPagination,
+    TimelinePagination,
+)
+from social_media.serializers import (
+    PostListSerializer,
+    PostSerializer,
+    ProfileListSerializer,
+)
+from social_media.timeline import afeed_queryset
+from user.authentication import CachedTokenAuthentication
+
+
+class AsyncReadView(View):
+    """
+    Read-only JSON view for the ASGI app, with the same authentication,
+    throttling and response as the matching viewset action.
+
+    Authentication, throttle checks and queries are awaited, so a slow
+    query does not hold a worker thread. Serializers only run on objects
+    that are already loaded.
+
+    Subclasses define ``async def get_data(self, request, *args,
+    **kwargs)``, which returns the response data.
+    """
+
+    http_method_names = ["get", "options"]
+    authentication_class = CachedTokenAuthentication
+    renderer = ORJSONRenderer()
+
+    async def get(self, request, *args, **kwargs):
+        api_request = Request(request)
+        try:
+            await self.authenticate(api_request)
+            await self.check_throttles(api_request)
+            data = await self.get_data(api_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
+
+    async def authenticate(self, request) -> None:
+        result = await self.authentication_class().aauthenticate(
+            request._request
+        )
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+
+    async def check_throttles(self, request) -> None:
+        waits = []
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            # Only Redis or cache I/O, no need for the request's DB thread.
+            allowed = await sync_to_async(
+                throttle.allow_request, thread_sensitive=False
+            )(request, self)
+            if not allowed:
+                waits.append(throttle.wait())
+
+        if waits:
+            raise exceptions.Throttled(
+                max((wait for wait in waits if wait is not None), default=None)
+            )
+
+    def handle_exception(self, exc):
+        data = exc.detail
+        if not isinstance(data, (list, dict)):
+            data = {"detail": data}
+        response = self.render(data, exc.status_code)
+
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            response["WWW-Authenticate"] = (
+                self.authentication_class().authenticate_header(None)
+            )
+        if getattr(exc, "wait", None):
+            response["Retry-After"] = str(math.ceil(exc.wait))
+        return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        response = HttpResponse(
+            self.renderer.render(data),
+            status=status_code,
+            content_type=self.renderer.media_type,
+        )
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+class AsyncPostListView(AsyncReadView):
+    """Feed and filtered post lists, as ``PostViewSet.list``."""
+
+    async def get_data(self, request):
+        queryset = Post.objects.select_related("owner")
+        if is_filtered_post_list(request.query_params):
+            queryset = filter_posts(queryset, request.query_params)
+            paginator = KeysetPagination()
+        else:
+            queryset = await afeed_queryset(request.user, queryset)
+            paginator = TimelinePagination()
+        queryset = PostListSerializer.optimize_queryset(
+            queryset, request, [KeysetPagination.key_field]
+        )
+
+        page = await paginator.apaginate_queryset(queryset, request, self)
+
+        context = {"request": request, "view": self}
+        serializer = PostListSerializer(page, many=True, context=context)
+        if "liked_by_me" in serializer.child.fields:
+            context["liked_post_ids"] = await aliked_post_ids(
+                request.user, [post.id for post in page]
+            )
+        return paginator.get_paginated_response(serializer.data).data
+
+
+class AsyncPostDetailView(AsyncReadView):
+    """A post with its comments preview, as ``PostViewSet.retrieve``."""
+
+    async def get_data(self, request, pk):
+        queryset = PostSerializer.optimize_queryset(
+            Post.objects.select_related("owner"), request
+        )
+        try:
+            post = await queryset.aget(pk=pk)
+        except Post.DoesNotExist:
+            raise exceptions.NotFound()
+
+        serializer = PostSerializer(
+            post, context={"request": request, "view": self}
+        )
+        if "comments" in serializer.fields:
+            post.preview_comments = [
+                comment
+                async for comment in PostSerializer.comments_preview_queryset(
+                    post
+                )
+            ]
+        return serializer.data
+
+
+class AsyncProfileListView(AsyncReadView):
+    """Profile list with its filters, as ``ProfileViewSet.list``."""
+
+    async def get_data(self, request):
+        queryset = filter_profiles(
+            Profile.objects.select_related("owner"), request.query_params
+        )
+        queryset = ProfileListSerializer.optimize_queryset(queryset, request)
+
+        paginator = AsyncLimitOffsetPagination()
+        page = await paginator.apaginate_queryset(queryset, request, self)
+
+        serializer = ProfileListSerializer(
+            page, many=True, context={"request": request, "view": self}
+        )
+        return paginator.get_paginated_response(serializer.data).data
@@ -0,0 +1,93 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from social_media.models import Comment, Like, Post, Profile
+
+
+def change_counter(queryset, field: str, delta: int) -> None:
+    queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def change_counters(model, field: str, deltas: dict) -> None:
+    """Apply ``{pk: delta}`` with one update per distinct delta."""
+    by_delta = {}
+    for pk, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(pk)
+    for delta, pks in by_delta.items():
+        change_counter(model.objects.filter(pk__in=pks), field, delta)
+
+
+def _count_subquery(queryset, field: str):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("*"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def _reconcile(model, counters: dict, batch_size: int) -> int:
+    """Rewrite the stored counters only on rows that drifted."""
+    repaired = 0
+    last_id = 0
+
+    while True:
+        ids = list(
+            model.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return repaired
+        last_id = ids[-1]
+
+        actual = {
+            f"actual_{field}": expression
+            for field, expression in counters.items()
+        }
+        drifted = (
+            model.objects.filter(id__in=ids)
+            .annotate(**actual)
+            .filter(
+                reduce(
+                    or_,
+                    [
+                        ~Q(**{field: F(f"actual_{field}")})
+                        for field in counters
+                    ],
+                )
+            )
+        )
+
+        drifted_ids = list(drifted.values_list("id", flat=True))
+        if drifted_ids:
+            repaired += model.objects.filter(id__in=drifted_ids).update(
+                **counters
+            )
+
+
+def reconcile_counters(batch_size: int = 1000) -> int:
+    follows = Profile.following.through.objects.all()
+
+    return _reconcile(
+        Post,
+        {
+            "likes_count": _count_subquery(Like.objects.all(), "post"),
+            "comments_count": _count_subquery(Comment.objects.all(), "post"),
+        },
+        batch_size,
+    ) + _reconcile(
+        Profile,
+        {
+            "followers_count": _count_subquery(follows, "to_profile"),
+            "following_count": _count_subquery(follows, "from_profile"),
+        },
+        batch_size,
+    )
@@ -0,0 +1,202 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def requested_names(request, param: str):
+    """Comma separated names of a query parameter, ``None`` when absent."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+
+    value = request.query_params.get(param, "")
+    names = {name.strip() for name in value.split(",")} - {""}
+    return names or None
+
+
+class QueryPlan:
+    """Columns and relations a serializer reads from a queryset."""
+
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = {}
+        # False when a field reads something that cannot be derived, the
+        # queryset is then left untouched.
+        self.complete = True
+
+    def apply(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(
+                *self.prefetch_related.values()
+            )
+        return queryset.only(*sorted(self.only))
+
+
+def build_plan(serializer, model, plan=None, prefix: str = ""):
+    plan = plan or QueryPlan()
+    plan.only.add(prefix + model._meta.pk.name)
+
+    for field in serializer.fields.values():
+        if not field.write_only:
+            _add_field(plan, model, serializer, field, prefix)
+    return plan
+
+
+def _add_field(plan, model, serializer, field, prefix: str) -> None:
+    loads = getattr(serializer, "field_loads", {}).get(field.field_name)
+    if loads is not None and field.field_name not in getattr(
+        serializer, "expanded_fields", ()
+    ):
+        plan.only.update(prefix + name for name in loads.get("only", ()))
+        plan.select_related.update(
+            prefix + name for name in loads.get("select_related", ())
+        )
+        return
+
+    if field.source == "*":
+        plan.complete = False
+        return
+
+    opts = model._meta
+    for index, attr in enumerate(field.source_attrs):
+        try:
+            model_field = opts.get_field(attr)
+        except FieldDoesNotExist:
+            plan.complete = False
+            return
+
+        lookup = prefix + "__".join(field.source_attrs[: index + 1])
+        last = index == len(field.source_attrs) - 1
+
+        if not model_field.is_relation:
+            if last:
+                plan.only.add(lookup)
+            else:
+                plan.complete = False
+            return
+
+        related_model = model_field.related_model
+        if model_field.many_to_many or model_field.one_to_many:
+            if not last:
+                plan.complete = False
+                return
+            child = getattr(field, "child", None)
+            if isinstance(child, serializers.BaseSerializer):
+                queryset = build_plan(child, related_model).apply(
+                    related_model._default_manager.all()
+                )
+            else:
+                queryset = related_model._default_manager.only(
+                    related_model._meta.pk.name
+                )
+            plan.prefetch_related[lookup] = Prefetch(
+                lookup, queryset=queryset
+            )
+            return
+
+        if not last:
+            plan.select_related.add(lookup)
+            opts = related_model._meta
+            continue
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            plan.only.add(lookup)
+        elif isinstance(field, serializers.BaseSerializer):
+            plan.select_related.add(lookup)
+            build_plan(field, related_model, plan, f"{lookup}__")
+        elif isinstance(field, serializers.SlugRelatedField):
+            try:
+                related_model._meta.get_field(field.slug_field)
+            except FieldDoesNotExist:
+                plan.complete = False
+                return
+            plan.select_related.add(lookup)
+            plan.only.add(f"{lookup}__{field.slug_field}")
+        else:
+            plan.complete = False
+        return
+
+
+class SparseFieldsMixin:
+    """
+    Serializer support for the ``?fields=`` and ``?expand=`` query
+    parameters of safe requests.
+
+    ``fields`` keeps only the named top-level fields. ``expand`` replaces
+    the fields named in ``expandable_fields`` by their nested serializer.
+    Fields whose source is not a model field declare what they read in
+    ``field_loads``, which lets ``optimize_queryset()`` load only the
+    columns and relations of the response.
+    """
+
+    expandable_fields = {}
+    field_loads = {}
+
+    def is_root(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.expanded_fields = set()
+        if not self.is_root():
+            return fields
+
+        request = self.context.get("request")
+        expand = requested_names(request, EXPAND_PARAM) or set()
+        for name in expand & self.expandable_fields.keys():
+            serializer_class, kwargs = self.expandable_fields[name]
+            fields[name] = serializer_class(**kwargs)
+            self.expanded_fields.add(name)
+
+        only = requested_names(request, FIELDS_PARAM)
+        if only is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in only
+            }
+        return fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request, required=()):
+        """Restrict ``queryset`` to what the response will serialize."""
+        plan = build_plan(cls(context={"request": request}), queryset.model)
+        if not plan.complete:
+            return queryset
+
+        plan.only.update(required)
+        return plan.apply(queryset)
+
+
+def optimize_view_queryset(view, queryset):
+    """
+    Apply ``optimize_queryset()`` of the view's serializer on safe
+    requests, keeping the pagination key loaded.
+    """
+    serializer_class = view.get_serializer_class()
+    if view.request.method not in SAFE_METHODS or not hasattr(
+        serializer_class, "optimize_queryset"
+    ):
+        return queryset
+
+    required = []
+    key_field = getattr(view.paginator, "key_field", None)
+    if key_field is not None:
+        try:
+            queryset.model._meta.get_field(key_field)
+        except FieldDoesNotExist:
+            pass
+        else:
+            required.append(key_field)
+
+    return serializer_class.optimize_queryset(
+        queryset, view.request, required
+    )
@@ -0,0 +1,58 @@
+from django.db.models import Exists, OuterRef
+
+from social_media.hashtags import normalize_hashtag
+from social_media.models import Post
+from social_media.search import autocomplete_profiles, search_profiles
+
+
+def filter_profiles(queryset, params):
+    """
+    Profile filters of the ``last_name``, ``first_name``, ``search`` and
+    ``autocomplete`` query parameters. They only join the owner, so the
+    profiles need no DISTINCT.
+    """
+    last_name = params.get("last_name")
+    first_name = params.get("first_name")
+    if last_name:
+        queryset = queryset.filter(owner__last_name__icontains=last_name)
+    if first_name:
+        queryset = queryset.filter(owner__first_name__icontains=first_name)
+
+    search = params.get("search", "").strip()
+    autocomplete = params.get("autocomplete", "").strip()
+    if search:
+        queryset = search_profiles(queryset, search)
+    elif autocomplete:
+        queryset = autocomplete_profiles(queryset, autocomplete)
+
+    return queryset
+
+
+def is_filtered_post_list(params) -> bool:
+    return bool(params.get("author") or params.get("hashtag"))
+
+
+def filter_posts(queryset, params):
+    """Post filters of the ``author`` and ``hashtag`` query parameters."""
+    author_id_str = params.get("author")
+    hashtag = params.get("hashtag")
+    if author_id_str:
+        queryset = queryset.filter(owner_id=int(author_id_str))
+
+    if hashtag:
+        if hashtag.endswith("*"):
+            lookup = {
+                "hashtag__name__startswith": normalize_hashtag(hashtag[:-1])
+            }
+        else:
+            lookup = {"hashtag__name": normalize_hashtag(hashtag)}
+        # A semi-join, a post with several matching hashtags is one row.
+        queryset = queryset.filter(
+            Exists(
+                Post.hashtags.through.objects.filter(
+                    post_id=OuterRef("pk"), **lookup
+                )
+            )
+        )
+
+    return queryset
@@ -0,0 +1,263 @@
+import logging
+import uuid
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed
+
+from social_media.models import Profile
+
+logger = logging.getLogger(__name__)
+
+Follow = Profile.following.through
+
+# Present in every loaded set so that "loaded but empty" differs from
+# "not loaded"; profile ids start at 1.
+LOADED_MARKER = 0
+
+# Every change bumps the version of the set, loaded or not, so that a
+# load that read the database before the change does not publish it.
+ADD_IF_LOADED = """
+redis.call("incr", KEYS[2])
+redis.call("expire", KEYS[2], ARGV[1])
+if redis.call("exists", KEYS[1]) == 1 then
+    return redis.call("sadd", KEYS[1], unpack(ARGV, 2))
+end
+return 0
+"""
+
+REMOVE_IF_LOADED = """
+redis.call("incr", KEYS[2])
+redis.call("expire", KEYS[2], ARGV[1])
+if redis.call("exists", KEYS[1]) == 1 then
+    return redis.call("srem", KEYS[1], unpack(ARGV, 2))
+end
+return 0
+"""
+
+PUBLISH_IF_UNCHANGED = """
+if (redis.call("get", KEYS[3]) or "") == ARGV[1] then
+    redis.call("rename", KEYS[2], KEYS[1])
+    redis.call("expire", KEYS[1], ARGV[2])
+    return 1
+end
+redis.call("del", KEYS[2])
+return 0
+"""
+
+
+class FollowGraphCache:
+    """
+    Redis sets with the following and followers ids of each profile.
+
+    Sets are loaded from the database on first use and afterwards kept in
+    sync from the follow ``m2m_changed`` signal. A load only publishes its
+    set when no change of that set was synced while it read the database.
+    """
+
+    key_prefix = "follow-graph"
+    load_chunk_size = 5000
+
+    def __init__(self, client, timeout: int):
+        self.client = client
+        self.timeout = timeout
+        self.add_if_loaded = client.register_script(ADD_IF_LOADED)
+        self.remove_if_loaded = client.register_script(REMOVE_IF_LOADED)
+        self.publish_if_unchanged = client.register_script(
+            PUBLISH_IF_UNCHANGED
+        )
+
+    def key(self, direction: str, profile_id: int) -> str:
+        return f"{self.key_prefix}:{direction}:{profile_id}"
+
+    def version_key(self, direction: str, profile_id: int) -> str:
+        return f"{self.key(direction, profile_id)}:version"
+
+    def load(self, direction: str, profile_id: int) -> bool:
+        """
+        Load a set from the database, ``False`` when a concurrent change
+        made the loaded ids stale and the set was left unloaded.
+        """
+        key = self.key(direction, profile_id)
+        version_key = self.version_key(direction, profile_id)
+        version = self.client.get(version_key) or b""
+
+        if direction == "following":
+            ids = Follow.objects.filter(from_profile_id=profile_id)
+            ids = ids.values_list("to_profile_id", flat=True)
+        else:
+            ids = Follow.objects.filter(to_profile_id=profile_id)
+            ids = ids.values_list("from_profile_id", flat=True)
+
+        loading_key = f"{key}:loading:{uuid.uuid4().hex}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(loading_key, LOADED_MARKER)
+        chunk = []
+        for related_id in ids.iterator(chunk_size=self.load_chunk_size):
+            chunk.append(related_id)
+            if len(chunk) == self.load_chunk_size:
+                pipe.sadd(loading_key, *chunk)
+                chunk = []
+        if chunk:
+            pipe.sadd(loading_key, *chunk)
+        pipe.expire(loading_key, self.timeout)
+        self.publish_if_unchanged(
+            keys=[key, loading_key, version_key],
+            args=[version, self.timeout],
+            client=pipe,
+        )
+        return bool(pipe.execute()[-1])
+
+    def is_member(self, direction: str, profile_id: int, related_id: int):
+        key = self.key(direction, profile_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(key)
+        pipe.sismember(key, related_id)
+        loaded, is_member = pipe.execute()
+
+        if loaded:
+            return bool(is_member)
+        if self.load(direction, profile_id):
+            return bool(self.client.sismember(key, related_id))
+        return None
+
+    def is_following(self, follower_id: int, profile_id: int):
+        """Cached answer, ``None`` when the set could not be loaded."""
+        return self.is_member("following", follower_id, profile_id)
+
+    def _update(self, script, follower_id: int, profile_ids) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for profile_id in profile_ids:
+            script(
+                keys=[
+                    self.key("followers", profile_id),
+                    self.version_key("followers", profile_id),
+                ],
+                args=[self.timeout, follower_id],
+                client=pipe,
+            )
+        script(
+            keys=[
+                self.key("following", follower_id),
+                self.version_key("following", follower_id),
+            ],
+            args=[self.timeout, *profile_ids],
+            client=pipe,
+        )
+        pipe.execute()
+
+    def add(self, follower_id: int, profile_ids) -> None:
+        self._update(self.add_if_loaded, follower_id, profile_ids)
+
+    def remove(self, follower_id: int, profile_ids) -> None:
+        self._update(self.remove_if_loaded, follower_id, profile_ids)
+
+    def forget(self, profile_id: int) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for direction in ("following", "followers"):
+            version_key = self.version_key(direction, profile_id)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.timeout)
+            pipe.delete(self.key(direction, profile_id))
+        pipe.execute()
+
+
+@lru_cache(maxsize=None)
+def _cache_for(url: str, timeout: int) -> FollowGraphCache:
+    return FollowGraphCache(redis.Redis.from_url(url), timeout)
+
+
+def get_graph_cache():
+    """The adjacency cache, or ``None`` when it is not configured."""
+    if not settings.FOLLOW_GRAPH_REDIS_URL:
+        return None
+    return _cache_for(
+        settings.FOLLOW_GRAPH_REDIS_URL, settings.FOLLOW_GRAPH_CACHE_TIMEOUT
+    )
+
+
+def is_following(follower_id: int, profile_id: int) -> bool:
+    graph_cache = get_graph_cache()
+    if graph_cache is not None:
+        try:
+            following = graph_cache.is_following(follower_id, profile_id)
+        except redis.RedisError:
+            logger.warning(
+                "Could not read the follow graph cache of profile %s",
+                follower_id,
+                exc_info=True,
+            )
+            following = None
+        if following is not None:
+            return following
+
+    return Follow.objects.filter(
+        from_profile_id=follower_id, to_profile_id=profile_id
+    ).exists()
+
+
+def _change_follows(sql: str, follower: Profile, profile_ids, action: str):
+    profile_ids = list(set(profile_ids))
+    if not profile_ids:
+        return set()
+
+    placeholders = ", ".join(["%s"] * len(profile_ids))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql.format(
+                    follow_table=Follow._meta.db_table,
+                    profile_table=Profile._meta.db_table,
+                    ids=placeholders,
+                ),
+                [follower.id, *profile_ids, follower.id],
+            )
+            changed = {row[0] for row in cursor.fetchall()}
+
+        if changed:
+            # Raw SQL bypasses the related manager, so notify the
+            # counters, timelines and caches the way add()/remove() do.
+            m2m_changed.send(
+                sender=Follow,
+                instance=follower,
+                action=action,
+                reverse=False,
+                model=Profile,
+                pk_set=changed,
+                using=connection.alias,
+            )
+
+    return changed
+
+
+def follow(follower: Profile, profile_ids) -> set:
+    """Follow existing profiles, returns the ids that were newly followed."""
+    return _change_follows(
+        """
+        INSERT INTO {follow_table} (from_profile_id, to_profile_id)
+        SELECT %s, id FROM {profile_table}
+        WHERE id IN ({ids}) AND id <> %s
+        ON CONFLICT (from_profile_id, to_profile_id) DO NOTHING
+        RETURNING to_profile_id
+        """,
+        follower,
+        profile_ids,
+        "post_add",
+    )
+
+
+def unfollow(follower: Profile, profile_ids) -> set:
+    """Unfollow profiles, returns the ids that were actually followed."""
+    return _change_follows(
+        """
+        DELETE FROM {follow_table}
+        WHERE from_profile_id = %s AND to_profile_id IN ({ids})
+        AND to_profile_id <> %s
+        RETURNING to_profile_id
+        """,
+        follower,
+        profile_ids,
+        "post_remove",
+    )
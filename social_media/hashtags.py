@@ -0,0 +1,51 @@
+import re
+
+from social_media.models import Hashtag, Post
+
+HASHTAG_RE = re.compile(r"\w+")
+HASHTAG_MAX_LENGTH = Hashtag._meta.get_field("name").max_length
+
+
+def normalize_hashtag(value: str) -> str:
+    return value.strip().lstrip("#").lower()[:HASHTAG_MAX_LENGTH]
+
+
+def parse_hashtags(text) -> list:
+    """Split the free-text ``Post.hashtag`` value into hashtag names."""
+    return sorted(
+        {normalize_hashtag(name) for name in HASHTAG_RE.findall(text or "")}
+    )
+
+
+def get_or_create_hashtags(names) -> dict:
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names], ignore_conflicts=True
+    )
+    return dict(
+        Hashtag.objects.filter(name__in=names).values_list("name", "id")
+    )
+
+
+def sync_hashtags(post: Post) -> None:
+    hashtag_ids = get_or_create_hashtags(parse_hashtags(post.hashtag))
+    post.hashtags.set(hashtag_ids.values())
+
+
+def backfill_hashtags(posts) -> int:
+    """Link the given posts to their hashtags with two bulk inserts."""
+    names_by_post = {post.id: parse_hashtags(post.hashtag) for post in posts}
+    hashtag_ids = get_or_create_hashtags(
+        {name for names in names_by_post.values() for name in names}
+    )
+
+    PostHashtag = Post.hashtags.through
+    links = PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(post_id=post_id, hashtag_id=hashtag_ids[name])
+            for post_id, names in names_by_post.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    return len(links)
@@ -0,0 +1,87 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from social_media import response_cache
+
+# Longest side in pixels of every variant, images are never upscaled.
+IMAGE_VARIANTS = {
+    "thumbnail": 160,
+    "feed": 720,
+    "full": 1600,
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_EXTENSION = ".webp"
+VARIANT_QUALITY = 80
+
+
+def needs_variants(instance) -> bool:
+    source = instance.image.name if instance.image else None
+    return instance.image_variants.get("source") != source
+
+
+def render_variant(image: Image.Image, size: int) -> bytes:
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    # Saved without exif or an ICC profile, so no metadata is kept.
+    output = io.BytesIO()
+    variant.save(
+        output, format=VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4
+    )
+    return output.getvalue()
+
+
+def generate_variants(field_file) -> dict:
+    """
+    Render every variant of a stored image, returns the storage names by
+    variant together with the name of the source image.
+    """
+    with field_file.open("rb") as file:
+        image = Image.open(file)
+        # Bake the EXIF orientation into the pixels before it is dropped.
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert(
+                "RGBA" if "transparency" in image.info else "RGB"
+            )
+
+        base, _ = os.path.splitext(field_file.name)
+        variants = {"source": field_file.name}
+        for name, size in IMAGE_VARIANTS.items():
+            variants[name] = field_file.storage.save(
+                f"{base}-{name}{VARIANT_EXTENSION}",
+                ContentFile(render_variant(image, size)),
+            )
+
+    return variants
+
+
+def delete_variants(storage, variants: dict) -> None:
+    for name in IMAGE_VARIANTS:
+        if variants.get(name):
+            storage.delete(variants[name])
+
+
+def update_variants(model, pk: int) -> None:
+    """Render the variants of the current image of a Post or Profile."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image or not needs_variants(instance):
+        return
+
+    storage = instance.image.storage
+    variants = generate_variants(instance.image)
+    updated = model.objects.filter(pk=pk, image=instance.image.name).update(
+        image_variants=variants
+    )
+
+    if not updated:
+        # The image was replaced meanwhile, its own task renders it.
+        delete_variants(storage, variants)
+        return
+
+    delete_variants(storage, instance.image_variants)
+    resource = model._meta.model_name
+    response_cache.invalidate(f"{resource}s", f"{resource}:{pk}")
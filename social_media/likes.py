@@ -0,0 +1,131 @@
+from django.db import connection
+
+from social_media import response_cache
+from social_media.models import Like, Post
+
+# Delete the like if it exists, otherwise insert it, and move the stored
+# counter by the difference, all in a single statement.
+TOGGLE_LIKE_SQL = f"""
+WITH deleted AS (
+    DELETE FROM {Like._meta.db_table}
+    WHERE owner_id = %(owner_id)s AND post_id = %(post_id)s
+    RETURNING id
+), inserted AS (
+    INSERT INTO {Like._meta.db_table} (owner_id, post_id, created_at)
+    SELECT %(owner_id)s, id, now() FROM {Post._meta.db_table}
+    WHERE id = %(post_id)s AND NOT EXISTS (SELECT 1 FROM deleted)
+    ON CONFLICT (owner_id, post_id) DO NOTHING
+    RETURNING id
+), counter AS (
+    UPDATE {Post._meta.db_table}
+    SET likes_count = GREATEST(
+        likes_count
+        + (SELECT count(*) FROM inserted)
+        - (SELECT count(*) FROM deleted),
+        0
+    )
+    WHERE id = %(post_id)s
+    RETURNING likes_count
+)
+SELECT
+    NOT EXISTS (SELECT 1 FROM deleted),
+    (SELECT likes_count FROM counter)
+"""
+
+
+def toggle_like(owner_id: int, post_id: int):
+    """
+    Like or unlike a post, returns ``(liked, likes_count)`` or ``None``
+    when the post does not exist.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TOGGLE_LIKE_SQL, {"owner_id": owner_id, "post_id": post_id}
+        )
+        liked, likes_count = cursor.fetchone()
+
+    if likes_count is None:
+        return None
+
+    # The statement bypasses the Like signals.
+    response_cache.invalidate(f"post:{post_id}", f"viewer:{owner_id}")
+    return liked, likes_count
+
+
+# Bulk variants: change the likes of one owner on many posts and move the
+# counters of the posts that actually changed, returning their ids.
+LIKE_MANY_SQL = f"""
+WITH inserted AS (
+    INSERT INTO {Like._meta.db_table} (owner_id, post_id, created_at)
+    SELECT %s, id, now() FROM {Post._meta.db_table}
+    WHERE id IN ({{ids}})
+    ON CONFLICT (owner_id, post_id) DO NOTHING
+    RETURNING post_id
+)
+UPDATE {Post._meta.db_table}
+SET likes_count = likes_count + 1
+WHERE id IN (SELECT post_id FROM inserted)
+RETURNING id
+"""
+
+UNLIKE_MANY_SQL = f"""
+WITH deleted AS (
+    DELETE FROM {Like._meta.db_table}
+    WHERE owner_id = %s AND post_id IN ({{ids}})
+    RETURNING post_id
+)
+UPDATE {Post._meta.db_table}
+SET likes_count = GREATEST(likes_count - 1, 0)
+WHERE id IN (SELECT post_id FROM deleted)
+RETURNING id
+"""
+
+
+def _change_likes(sql: str, owner_id: int, post_ids) -> set:
+    post_ids = list(set(post_ids))
+    if not post_ids:
+        return set()
+
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(ids=placeholders), [owner_id, *post_ids])
+        changed = {row[0] for row in cursor.fetchall()}
+
+    if changed:
+        response_cache.invalidate(
+            *(f"post:{post_id}" for post_id in changed), f"viewer:{owner_id}"
+        )
+    return changed
+
+
+def like_posts(owner_id: int, post_ids) -> set:
+    """Like existing posts, returns the ids that were newly liked."""
+    return _change_likes(LIKE_MANY_SQL, owner_id, post_ids)
+
+
+def unlike_posts(owner_id: int, post_ids) -> set:
+    """Unlike posts, returns the ids that were actually liked."""
+    return _change_likes(UNLIKE_MANY_SQL, owner_id, post_ids)
+
+
+def liked_post_ids(user, post_ids) -> set:
+    if not user.is_authenticated or not post_ids:
+        return set()
+
+    return set(
+        Like.objects.filter(owner=user, post_id__in=post_ids).values_list(
+            "post_id", flat=True
+        )
+    )
+
+
+async def aliked_post_ids(user, post_ids) -> set:
+    if not user.is_authenticated or not post_ids:
+        return set()
+
+    return {
+        post_id
+        async for post_id in Like.objects.filter(
+            owner=user, post_id__in=post_ids
+        ).values_list("post_id", flat=True)
+    }
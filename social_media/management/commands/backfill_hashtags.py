@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand
+
+from social_media.hashtags import backfill_hashtags
+from social_media.models import Post
+
+
+class Command(BaseCommand):
+    """Django command to link existing posts to normalized hashtags"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = (
+            Post.objects.exclude(hashtag__isnull=True)
+            .exclude(hashtag="")
+            .order_by("id")
+            .only("id", "hashtag")
+        )
+        last_id = 0
+        total = 0
+
+        while True:
+            batch = list(
+                posts.filter(id__gt=last_id)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            total += backfill_hashtags(batch)
+            self.stdout.write(f"Processed posts up to id {last_id}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {total} post hashtag link(s).")
+        )
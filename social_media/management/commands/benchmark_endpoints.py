@@ -0,0 +1,307 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from social_media import graph
+from social_media.models import Comment, Like, Post, Profile
+
+BENCHMARK_COMMENT = "Benchmark comment"
+
+
+def percentile(values, percent: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    index = max(0, round(percent / 100 * len(values) + 0.5) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure latency, throughput and queries per request
+    of the main endpoints against the current database
+    """
+
+    endpoints = (
+        "feed",
+        "post_detail",
+        "profile_list",
+        "like_toggle",
+        "follow",
+        "comment",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per endpoint",
+        )
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=self.endpoints,
+            default=self.endpoints,
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=50,
+            help="Requests rotate over this many users, which keeps them "
+            "under the throttle rates",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--label",
+            default=None,
+            help="Name of the run, the git revision by default",
+        )
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON report of an earlier run to print the changes against",
+        )
+        parser.add_argument(
+            "--no-response-cache",
+            action="store_true",
+            help="Measure with the response cache disabled",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        profiles = list(
+            Profile.objects.select_related("owner")
+            .filter(owner__is_active=True)
+            .order_by("?")[: options["users"]]
+        )
+        self.post_ids = list(
+            Post.objects.order_by("-created_at").values_list("id", flat=True)[
+                :1000
+            ]
+        )
+        self.profile_ids = list(
+            Profile.objects.order_by("-followers_count").values_list(
+                "id", flat=True
+            )[:1000]
+        )
+        if not profiles or not self.post_ids:
+            raise CommandError(
+                "The database has no profiles or posts, run seed_dataset."
+            )
+
+        self.clients = []
+        for profile in profiles:
+            token, _ = Token.objects.get_or_create(user=profile.owner)
+            client = APIClient(raise_request_exception=False)
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+            self.clients.append((client, profile))
+
+        # Requests go through the test client, as the test runner does,
+        # without the query log and debug views of DEBUG.
+        run_settings = {
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+            "DEBUG": False,
+        }
+        if options["no_response_cache"]:
+            run_settings["RESPONSE_CACHE_ENABLED"] = False
+        results = {}
+        with override_settings(**run_settings):
+            for endpoint in options["endpoints"]:
+                results[endpoint] = self.run_endpoint(
+                    endpoint, options["warmup"], options["requests"]
+                )
+                self.stderr.write(self.summary_line(endpoint, results))
+
+        report = {
+            "meta": {
+                "label": options["label"] or git_revision(),
+                "timestamp": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "response_cache": not options["no_response_cache"]
+                and settings.RESPONSE_CACHE_ENABLED,
+                "users": len(self.clients),
+                "dataset": {
+                    "users": get_user_model().objects.count(),
+                    "posts": Post.objects.count(),
+                    "comments": Comment.objects.count(),
+                    "likes": Like.objects.count(),
+                    "follows": Profile.following.through.objects.count(),
+                },
+            },
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                self.compare(json.load(file), report)
+
+    def compare(self, baseline: dict, report: dict) -> None:
+        self.stderr.write(f"Compared with {baseline['meta']['label']}:")
+        for endpoint, result in report["endpoints"].items():
+            before = baseline["endpoints"].get(endpoint)
+            if before is None:
+                continue
+            changes = [
+                f"{name} {result['latency_ms'][name] / value - 1:+.1%}"
+                for name, value in before["latency_ms"].items()
+                if value
+            ]
+            queries = (
+                result["queries_per_request"]["mean"]
+                - before["queries_per_request"]["mean"]
+            )
+            self.stderr.write(
+                f"{endpoint:<14} {'  '.join(changes)}  queries {queries:+.2f}"
+            )
+
+    def run_endpoint(self, endpoint: str, warmup: int, requests: int):
+        scenario = getattr(self, f"request_{endpoint}")
+        for number in range(warmup):
+            self.send(scenario, number)
+
+        timings = []
+        queries = []
+        status_codes = {}
+        for number in range(requests):
+            elapsed, query_count, status_code = self.send(scenario, number)
+            timings.append(elapsed)
+            queries.append(query_count)
+            status_codes[status_code] = status_codes.get(status_code, 0) + 1
+
+        timings.sort()
+        return {
+            "requests": requests,
+            "errors": sum(
+                count for code, count in status_codes.items() if code >= 400
+            ),
+            "status_codes": {
+                str(code): count
+                for code, count in sorted(status_codes.items())
+            },
+            "latency_ms": {
+                "p50": round(percentile(timings, 50) * 1000, 3),
+                "p95": round(percentile(timings, 95) * 1000, 3),
+                "p99": round(percentile(timings, 99) * 1000, 3),
+                "mean": round(statistics.fmean(timings) * 1000, 3),
+            },
+            # Serial requests, setup and cleanup between them excluded.
+            "throughput_rps": round(requests / sum(timings), 1),
+            "queries_per_request": {
+                "mean": round(statistics.fmean(queries), 2),
+                "max": max(queries),
+            },
+        }
+
+    def send(self, scenario, number: int):
+        client, profile = self.clients[number % len(self.clients)]
+        request, cleanup = scenario(profile)
+
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = request(client)
+            elapsed = time.perf_counter() - start
+
+        if cleanup is not None:
+            cleanup()
+        return elapsed, len(context.captured_queries), response.status_code
+
+    def request_feed(self, profile):
+        url = reverse("social_media:post-list")
+        return (lambda client: client.get(url)), None
+
+    def request_post_detail(self, profile):
+        url = reverse(
+            "social_media:post-detail",
+            kwargs={"pk": self.rng.choice(self.post_ids)},
+        )
+        return (lambda client: client.get(url)), None
+
+    def request_profile_list(self, profile):
+        url = reverse("social_media:profile-list")
+        return (lambda client: client.get(url)), None
+
+    def request_like_toggle(self, profile):
+        url = reverse(
+            "social_media:post-like",
+            kwargs={"pk": self.rng.choice(self.post_ids)},
+        )
+        return (lambda client: client.post(url)), None
+
+    def request_follow(self, profile):
+        following = set(profile.following.values_list("id", flat=True))
+        candidates = [
+            profile_id
+            for profile_id in self.profile_ids
+            if profile_id != profile.id and profile_id not in following
+        ]
+        followed_id = self.rng.choice(candidates or self.profile_ids)
+        url = reverse(
+            "social_media:profile-follow", kwargs={"pk": followed_id}
+        )
+
+        def cleanup():
+            # Put the graph back so every run measures new follows.
+            graph.unfollow(profile, [followed_id])
+
+        return (lambda client: client.post(url)), cleanup
+
+    def request_comment(self, profile):
+        url = reverse(
+            "social_media:post-create-comment",
+            kwargs={"pk": self.rng.choice(self.post_ids)},
+        )
+
+        def cleanup():
+            # Leave the dataset as it was seeded.
+            Comment.objects.filter(
+                owner=profile.owner, text=BENCHMARK_COMMENT
+            ).delete()
+
+        return (
+            lambda client: client.post(url, {"text": BENCHMARK_COMMENT})
+        ), cleanup
+
+    @staticmethod
+    def summary_line(endpoint: str, results: dict) -> str:
+        result = results[endpoint]
+        latency = result["latency_ms"]
+        return (
+            f"{endpoint:<14} p50 {latency['p50']:>8.2f} ms  "
+            f"p95 {latency['p95']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+            f"{result['throughput_rps']:>8.1f} req/s  "
+            f"{result['queries_per_request']['mean']:>6.2f} queries  "
+            f"{result['errors']} errors"
+        )
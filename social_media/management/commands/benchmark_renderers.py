@@ -0,0 +1,145 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from app.parsers import MessagePackParser, ORJSONParser
+from app.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from social_media.images import IMAGE_VARIANTS
+from social_media.models import Post
+from social_media.pagination import KeysetPagination
+from social_media.serializers import PostListSerializer
+
+WORDS = (
+    "django rest api post feed photo weekend coffee travel music team "
+    "release python café über naïve 🎉 👍 sunset city night"
+).split()
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the JSON renderers on post list pages"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size", type=int, default=KeysetPagination.page_size
+        )
+        parser.add_argument("--pages", type=int, default=200)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Best of this many runs is reported",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        pages = [
+            self.build_page(rng, number, options["page_size"])
+            for number in range(options["pages"])
+        ]
+
+        formats = [
+            ("JSONRenderer", JSONRenderer(), JSONParser()),
+            ("ORJSONRenderer", ORJSONRenderer(), ORJSONParser()),
+        ]
+        if msgpack is not None:
+            formats.append(
+                (
+                    "MessagePackRenderer",
+                    MessagePackRenderer(),
+                    MessagePackParser(),
+                )
+            )
+        else:
+            self.stdout.write("msgpack is not installed, skipping it.")
+
+        baseline = None
+        expected = [formats[0][1].render(page) for page in pages]
+        self.stdout.write(
+            f"{len(pages)} pages of {options['page_size']} posts, "
+            f"best of {options['repeat']} runs"
+        )
+        self.stdout.write(
+            f"{'renderer':<22}{'render µs/page':>16}{'parse µs/page':>16}"
+            f"{'bytes/page':>12}{'speedup':>10}"
+        )
+
+        for name, renderer, parser in formats:
+            rendered = [renderer.render(page) for page in pages]
+            render_time = self.best_of(
+                options["repeat"],
+                lambda: [renderer.render(page) for page in pages],
+            )
+            parse_time = self.best_of(
+                options["repeat"],
+                lambda: [parser.parse(BytesIO(body)) for body in rendered],
+            )
+            baseline = baseline or render_time
+            size = sum(map(len, rendered)) / len(pages)
+
+            self.stdout.write(
+                f"{name:<22}"
+                f"{render_time / len(pages) * 1e6:>16.1f}"
+                f"{parse_time / len(pages) * 1e6:>16.1f}"
+                f"{size:>12.0f}"
+                f"{baseline / render_time:>9.2f}x"
+            )
+            if renderer.format == "json" and rendered != expected:
+                self.stderr.write(f"{name} output differs from JSONRenderer.")
+
+    @staticmethod
+    def best_of(repeat: int, function) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    @staticmethod
+    def build_page(rng, number: int, page_size: int) -> dict:
+        """A serialized feed page, built in memory."""
+        now = timezone.now()
+        posts = []
+        for index in range(page_size):
+            post_id = number * page_size + index + 1
+            owner = get_user_model()(
+                id=rng.randint(1, 10_000),
+                first_name=rng.choice(WORDS).title(),
+                last_name=rng.choice(WORDS).title(),
+            )
+            digest = f"{rng.getrandbits(256):064x}"
+            has_image = rng.random() < 0.6
+            posts.append(
+                Post(
+                    id=post_id,
+                    owner=owner,
+                    text=" ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+                    hashtag=f"#{rng.choice(WORDS)}",
+                    image=f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+                    if has_image
+                    else None,
+                    image_variants={
+                        variant: f"blobs/{digest[:2]}/{variant}/{digest}.webp"
+                        for variant in IMAGE_VARIANTS
+                    }
+                    if has_image
+                    else {},
+                    likes_count=rng.randint(0, 5000),
+                    comments_count=rng.randint(0, 300),
+                    created_at=now - timedelta(minutes=post_id),
+                )
+            )
+
+        return {
+            "next": f"http://testserver/api/social/posts/?cursor={number}",
+            "previous": None,
+            "results": PostListSerializer(posts, many=True).data,
+        }
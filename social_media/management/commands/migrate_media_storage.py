@@ -0,0 +1,91 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+
+from social_media.images import IMAGE_VARIANTS
+from social_media.models import Post, Profile, ScheduledPost
+from social_media.storage import BLOB_PREFIX
+
+
+class Command(BaseCommand):
+    """Django command to move existing media into content-addressed storage"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.moved = {}
+        total = 0
+
+        for model in (Profile, Post, ScheduledPost):
+            rows = (
+                model.objects.exclude(image__isnull=True)
+                .exclude(image="")
+                .exclude(image__startswith=f"{BLOB_PREFIX}/")
+                .order_by("pk")
+            )
+            last_pk = 0
+
+            while True:
+                batch = list(
+                    rows.filter(pk__gt=last_pk)[: options["batch_size"]]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for instance in batch:
+                    total += self.migrate_instance(model, instance)
+                self.stdout.write(
+                    f"Processed {model._meta.verbose_name} up to id "
+                    f"{last_pk}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved the media of {total} object(s).")
+        )
+
+    def migrate_file(self, name: str):
+        """Store a legacy file as a blob, returns the blob name."""
+        source = name if default_storage.exists(name) else self.moved.get(name)
+        if source is None:
+            self.stderr.write(f"Missing media file {name}, skipped.")
+            return None
+
+        # Rows may share a file, later rows take a reference to the blob.
+        with default_storage.open(source, "rb") as file:
+            blob_name = default_storage.save(name, File(file))
+        self.moved[name] = blob_name
+        return blob_name
+
+    def migrate_instance(self, model, instance) -> int:
+        old_name = instance.image.name
+        new_name = self.migrate_file(old_name)
+        if new_name is None:
+            return 0
+
+        changes = {"image": new_name}
+        legacy_files = [old_name]
+        blobs = [new_name]
+        variants = getattr(instance, "image_variants", None)
+        if variants:
+            variants = dict(variants, source=new_name)
+            for variant in IMAGE_VARIANTS:
+                path = variants.get(variant)
+                if path and not default_storage.is_blob_name(path):
+                    variants[variant] = self.migrate_file(path)
+                    legacy_files.append(path)
+                    blobs.append(variants[variant])
+            changes["image_variants"] = variants
+
+        if not model.objects.filter(pk=instance.pk, image=old_name).update(
+            **changes
+        ):
+            # Changed meanwhile, give the references back.
+            for name in filter(None, blobs):
+                default_storage.delete(name)
+            return 0
+
+        for name in legacy_files:
+            if default_storage.exists(name):
+                default_storage.delete(name)
+        return 1
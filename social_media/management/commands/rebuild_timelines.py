@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+
+from social_media.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    """Django command to rebuild precomputed home timelines"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            nargs="+",
+            dest="user_ids",
+            help="Rebuild only the timelines of these user ids",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["user_ids"]:
+            users = users.filter(id__in=options["user_ids"])
+
+        total = 0
+        for user_id in users.values_list("id", flat=True).iterator():
+            rebuild_timeline(user_id)
+            total += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {total} timeline(s).")
+        )
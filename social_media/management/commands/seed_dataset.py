@@ -0,0 +1,53 @@
+from django.core.management import BaseCommand
+
+from social_media.seeding import SEED_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    """Django command to generate a realistic dataset with bulk inserts"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--posts-per-user",
+            type=float,
+            default=5,
+            help="Average, the actual counts follow a power law",
+        )
+        parser.add_argument("--follows-per-user", type=float, default=20)
+        parser.add_argument(
+            "--likes-per-post",
+            type=float,
+            default=5,
+            help="Average, popular authors get more",
+        )
+        parser.add_argument("--comments-per-post", type=float, default=1)
+        parser.add_argument(
+            "--exponent",
+            type=float,
+            default=1.1,
+            help="Power law exponent of profile popularity",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        counts = seed_dataset(
+            users=options["users"],
+            posts_per_user=options["posts_per_user"],
+            follows_per_user=options["follows_per_user"],
+            likes_per_post=options["likes_per_post"],
+            comments_per_post=options["comments_per_post"],
+            exponent=options["exponent"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+
+        self.stdout.write(
+            ", ".join(f"{total} {name}" for name, total in counts.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded the dataset, users log in with {SEED_PASSWORD!r}."
+            )
+        )
@@ -0,0 +1,15 @@
+from prometheus_client import Counter, Histogram
+
+from app.task_metrics import LAG_BUCKETS
+
+response_cache_requests = Counter(
+    "social_media_response_cache_requests_total",
+    "Cacheable API requests by endpoint and cache result.",
+    ["endpoint", "result"],
+)
+scheduled_post_publish_lag = Histogram(
+    "scheduled_post_publish_lag_seconds",
+    "Delay between the publish time of a scheduled post and its "
+    "publication.",
+    buckets=LAG_BUCKETS,
+)
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0010_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="like",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="comment_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="like_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="post_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["owner", "-created_at", "-id"], name="post_owner_created_id_idx"
+            ),
+        ),
+    ]
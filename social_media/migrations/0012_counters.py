@@ -0,0 +1,66 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("*"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("social_media", "Post")
+    Profile = apps.get_model("social_media", "Profile")
+    Like = apps.get_model("social_media", "Like")
+    Comment = apps.get_model("social_media", "Comment")
+    follows = Profile.following.through.objects.all()
+
+    Post.objects.update(
+        likes_count=count_of(Like.objects.all(), "post"),
+        comments_count=count_of(Comment.objects.all(), "post"),
+    )
+    Profile.objects.update(
+        followers_count=count_of(follows, "to_profile"),
+        following_count=count_of(follows, "from_profile"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0011_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0012_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Hashtag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=125, unique=True)),
+            ],
+            options={
+                "ordering": ["name"],
+                "indexes": [
+                    models.Index(
+                        fields=["name"],
+                        name="hashtag_name_prefix_idx",
+                        opclasses=["varchar_pattern_ops"],
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="hashtags",
+            field=models.ManyToManyField(
+                blank=True, related_name="posts", to="social_media.hashtag"
+            ),
+        ),
+    ]
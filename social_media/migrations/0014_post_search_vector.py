@@ -0,0 +1,52 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION social_media_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.hashtag, '')), 'A')
+        || setweight(to_tsvector('pg_catalog.english', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER social_media_post_search_vector_trigger
+BEFORE INSERT OR UPDATE OF text, hashtag ON social_media_post
+FOR EACH ROW EXECUTE FUNCTION social_media_post_search_vector_update();
+
+UPDATE social_media_post SET text = text;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS social_media_post_search_vector_trigger
+ON social_media_post;
+DROP FUNCTION IF EXISTS social_media_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0013_hashtag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="post_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:54
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    Like = apps.get_model("social_media", "Like")
+    Post = apps.get_model("social_media", "Post")
+
+    duplicates = (
+        Like.objects.values("owner_id", "post_id")
+        .annotate(first_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        Like.objects.filter(
+            owner_id=duplicate["owner_id"], post_id=duplicate["post_id"]
+        ).exclude(id=duplicate["first_id"]).delete()
+        Post.objects.filter(id=duplicate["post_id"]).update(
+            likes_count=Like.objects.filter(
+                post_id=duplicate["post_id"]
+            ).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0014_post_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "post"), name="unique_like"
+            ),
+        ),
+    ]
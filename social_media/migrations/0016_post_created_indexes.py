@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0015_unique_like"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="comment_post_created_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["post", "-created_at", "-id"], name="like_post_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.9 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import social_media.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("social_media", "0016_post_created_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.TextField(max_length=255)),
+                ("hashtag", models.CharField(blank=True, max_length=125, null=True)),
+                (
+                    "image",
+                    models.ImageField(
+                        blank=True,
+                        null=True,
+                        upload_to=social_media.models.post_image_file_path,
+                    ),
+                ),
+                ("publish_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_posts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["publish_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["publish_at"], name="scheduled_post_publish_at_idx"
+                    )
+                ],
+            },
+        ),
+    ]
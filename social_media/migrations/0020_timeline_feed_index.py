@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social_media", "0019_mediablob"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="timelineentry",
+            name="timeline_owner_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["owner", "-created_at", "-id"], name="timeline_owner_feed_idx"
+            ),
+        ),
+    ]
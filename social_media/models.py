@@ -2,6 +2,8 @@ import os
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 
@@ -27,9 +29,12 @@ class Profile(models.Model):
     bio = models.TextField(max_length=255, null=True, blank=True)
     phone_number = models.CharField(max_length=18, null=True, blank=True)
     image = models.ImageField(null=True, upload_to=profile_image_file_path)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     following = models.ManyToManyField(
         "self", symmetrical=False, blank=True, related_name="followers"
     )
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return str(self.owner.full_name)
@@ -46,6 +51,23 @@ def post_image_file_path(instance, filename):
     return os.path.join("uploads", "posts", filename)
 
 
+class Hashtag(models.Model):
+    name = models.CharField(max_length=125, unique=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+    class Meta:
+        ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=["name"],
+                name="hashtag_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            )
+        ]
+
+
 class Post(models.Model):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -58,12 +80,29 @@ class Post(models.Model):
     image = models.ImageField(
         null=True, upload_to=post_image_file_path, blank=True
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    hashtags = models.ManyToManyField(
+        Hashtag, blank=True, related_name="posts"
+    )
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.text
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="post_created_id_idx"
+            ),
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="post_owner_created_id_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+        ]
 
 
 class Comment(models.Model):
@@ -81,6 +120,17 @@ class Comment(models.Model):
     def __str__(self):
         return f"{self.owner.full_name} added comments to {self.post.id}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="comment_created_id_idx"
+            ),
+            models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="comment_post_created_id_idx",
+            ),
+        ]
+
 
 class Like(models.Model):
     owner = models.ForeignKey(
@@ -91,3 +141,97 @@ class Like(models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="likes"
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_like"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="like_created_id_idx"
+            ),
+            models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="like_post_created_id_idx",
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of {self.owner_id}"
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="timeline_owner_feed_idx",
+            )
+        ]
+
+
+class ScheduledPost(models.Model):
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="scheduled_posts",
+    )
+    text = models.TextField(max_length=255)
+    hashtag = models.CharField(max_length=125, null=True, blank=True)
+    image = models.ImageField(
+        null=True, upload_to=post_image_file_path, blank=True
+    )
+    publish_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.text} at {self.publish_at}"
+
+    class Meta:
+        ordering = ["publish_at"]
+        indexes = [
+            models.Index(
+                fields=["publish_at"], name="scheduled_post_publish_at_idx"
+            )
+        ]
+
+
+class MediaBlob(models.Model):
+    """A stored file shared by every upload with the same content."""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="media_blob_unreferenced_idx",
+                condition=models.Q(ref_count=0),
+            )
+        ]
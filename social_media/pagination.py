@@ -0,0 +1,224 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)``, newest first.
+
+    Pages are located with an indexed range condition instead of an OFFSET
+    and no COUNT query is issued, so every page costs the same.
+    """
+
+    key_field = "created_at"
+    id_field = "id"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.set_page([obj async for obj in queryset])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        key, pk, reverse = self.decode_cursor(request)
+        self.cursor_given = key is not None
+        self.reverse = reverse
+        field, id_field = self.key_field, self.id_field
+
+        if self.cursor_given:
+            if reverse:
+                queryset = queryset.filter(**{f"{field}__gte": key}).filter(
+                    Q(**{f"{field}__gt": key}) | Q(**{f"{id_field}__gt": pk})
+                )
+            else:
+                # The redundant lte bound keeps this a single index range
+                # scan on (key, id).
+                queryset = queryset.filter(**{f"{field}__lte": key}).filter(
+                    Q(**{f"{field}__lt": key}) | Q(**{f"{id_field}__lt": pk})
+                )
+
+        ordering = (
+            (field, id_field) if reverse else (f"-{field}", f"-{id_field}")
+        )
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor_given
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            key = self.parse_key(data["k"])
+            pk = int(data["i"])
+            reverse = bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return key, pk, reverse
+
+    def parse_key(self, value):
+        return parse_datetime(value)
+
+    def dump_key(self, obj):
+        return getattr(obj, self.key_field).isoformat()
+
+    def encode_cursor(self, obj, reverse=False):
+        data = {"k": self.dump_key(obj), "i": getattr(obj, self.id_field)}
+        if reverse:
+            data["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode())
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode()
+        )
+
+    @classmethod
+    def link_after(cls, url, obj):
+        """Link to the page that follows ``obj`` in the list at ``url``."""
+        paginator = cls()
+        paginator.base_url = url
+        return paginator.encode_cursor(obj)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class TimelinePagination(KeysetPagination):
+    """
+    Keyset pagination of a feed over its timeline entries, annotated by
+    ``feed_queryset()``.
+    """
+
+    key_field = "feed_created_at"
+    id_field = "feed_id"
+
+
+class SearchRankPagination(KeysetPagination):
+    """Keyset pagination over ``(rank, id)``, most relevant first."""
+
+    key_field = "rank"
+
+    def parse_key(self, value):
+        return float(value)
+
+    def dump_key(self, obj):
+        return obj.rank
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """``LimitOffsetPagination`` that can also page with the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        end = self.offset + self.limit
+        return [obj async for obj in queryset[self.offset:end]]
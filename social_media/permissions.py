@@ -9,5 +9,10 @@ class IsOwnerOrIfAuthenticatedReadOnly(BasePermission):
                 and request.user
                 and request.user.is_authenticated
             )
-            or (obj.owner == request.user)
+            or (obj.owner_id == request.user.id)
         )
+
+    def has_batch_permission(self, request, view, objects):
+        if request.method in SAFE_METHODS:
+            return bool(request.user and request.user.is_authenticated)
+        return all(obj.owner_id == request.user.id for obj in objects)
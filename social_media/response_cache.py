@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import time
+import uuid
+from functools import wraps
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from app.db_router import read_from_replica
+from social_media.metrics import response_cache_requests
+
+logger = logging.getLogger(__name__)
+
+VERSION_PREFIX = "response-version"
+RESPONSE_PREFIX = "response"
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def is_enabled(endpoint: str) -> bool:
+    return (
+        settings.RESPONSE_CACHE_ENABLED
+        and endpoint not in settings.RESPONSE_CACHE_DISABLED_ENDPOINTS
+    )
+
+
+def _new_version() -> str:
+    # The bump time lets replica reads tell whether the replica may still
+    # be missing the write behind a version.
+    return f"{time.time()}-{uuid.uuid4().hex}"
+
+
+def _version_time(version: str) -> float:
+    try:
+        return float(version.partition("-")[0])
+    except ValueError:
+        # Versions stored before they carried a time.
+        return 0.0
+
+
+def get_versions(names) -> list:
+    """
+    Current version token of every resource, a fresh token is stored for
+    resources without one so that evicted versions never match old entries.
+    """
+    cache = get_cache()
+    keys = [f"{VERSION_PREFIX}:{name}" for name in names]
+    versions = cache.get_many(keys)
+
+    missing = {
+        key: _new_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def _bump(keys) -> None:
+    try:
+        get_cache().set_many(
+            {key: _new_version() for key in keys}, timeout=None
+        )
+    except redis.RedisError:
+        logger.warning("Could not invalidate cached responses", exc_info=True)
+
+
+def invalidate(*names) -> None:
+    """
+    Give the resources new versions, which orphans every cached response
+    built from them.
+
+    Versions are bumped right away, so later reads in this transaction
+    miss, and again after commit, so a response cached by a concurrent
+    read of the old rows in between is discarded as well.
+    """
+    keys = [f"{VERSION_PREFIX}:{name}" for name in names]
+    if not keys:
+        return
+
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def response_key(endpoint: str, request, versions) -> str:
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    digest = hashlib.sha1(
+        "\n".join(
+            [request.get_full_path(), request.accepted_media_type, *versions]
+        ).encode()
+    ).hexdigest()
+    return f"{RESPONSE_PREFIX}:{endpoint}:{user_id}:{digest}"
+
+
+def replica_is_current(names, versions) -> bool:
+    """
+    Whether a response read from a replica reflects ``versions``: none of
+    them changed during the read, and none is younger than
+    ``REPLICA_MAX_LAG``, the most a replica in use can be behind.
+    """
+    if get_versions(names) != versions:
+        return False
+    bumped_before = time.time() - settings.REPLICA_MAX_LAG
+    return all(_version_time(version) < bumped_before for version in versions)
+
+
+def cache_response(view_method):
+    """
+    Cache the data of successful responses per user, request URL and the
+    versions of the resources returned by the view's
+    ``get_cache_resources()``.
+
+    Responses read from a replica are stored only when the replica has
+    caught up with the versions (see ``replica_is_current``), so resources
+    written in the last ``REPLICA_MAX_LAG`` seconds are not cached from
+    replica reads until they settle.
+    """
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        endpoint = f"{view.basename}-{view.action}"
+        if not is_enabled(endpoint):
+            return view_method(view, request, *args, **kwargs)
+
+        cache = get_cache()
+        try:
+            resources = view.get_cache_resources()
+            versions = get_versions(resources)
+            key = response_key(endpoint, request, versions)
+            data = cache.get(key)
+        except redis.RedisError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return view_method(view, request, *args, **kwargs)
+
+        if data is not None:
+            response_cache_requests.labels(endpoint, "hit").inc()
+            return Response(data)
+
+        response_cache_requests.labels(endpoint, "miss").inc()
+        response = view_method(view, request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        try:
+            if not read_from_replica() or replica_is_current(
+                resources, versions
+            ):
+                cache.set(
+                    key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+                )
+        except redis.RedisError:
+            logger.warning("Could not cache a response", exc_info=True)
+        return response
+
+    return wrapper
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.utils import timezone
+
+from social_media import response_cache, timeline
+from social_media.hashtags import backfill_hashtags
+from social_media.images import needs_variants
+from social_media.metrics import scheduled_post_publish_lag
+from social_media.models import Post, ScheduledPost
+
+
+def _schedule_image_variants(posts) -> None:
+    # tasks imports this module.
+    from social_media.tasks import generate_image_variants
+
+    label = Post._meta.label
+    pks = [post.pk for post in posts if post.image and needs_variants(post)]
+    if not pks:
+        return
+
+    def schedule():
+        for pk in pks:
+            generate_image_variants.delay(label, pk)
+
+    transaction.on_commit(schedule)
+
+
+def publish_due_posts(batch_size: int = 500) -> int:
+    """
+    Publish the scheduled posts that are due, returns how many were
+    published.
+
+    Due rows are claimed in batches with ``SELECT ... FOR UPDATE SKIP
+    LOCKED``, so concurrent dispatchers never publish a post twice and
+    never wait on each other.
+    """
+    published = 0
+
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            claimed = list(
+                ScheduledPost.objects.select_for_update(skip_locked=True)
+                .filter(publish_at__lte=now)
+                .order_by("publish_at")[:batch_size]
+            )
+            if not claimed:
+                break
+
+            posts = Post.objects.bulk_create(
+                [
+                    Post(
+                        owner_id=scheduled.owner_id,
+                        text=scheduled.text,
+                        hashtag=scheduled.hashtag,
+                        # The stored upload is referenced, not copied.
+                        image=scheduled.image.name or None,
+                    )
+                    for scheduled in claimed
+                ]
+            )
+            ScheduledPost.objects.filter(
+                id__in=[scheduled.id for scheduled in claimed]
+            ).delete()
+
+            # bulk_create skips the post_save receivers, do their work for
+            # the whole batch at once.
+            backfill_hashtags(posts)
+            owner_ids = timeline.fan_out_posts(posts)
+            response_cache.invalidate(
+                "posts", *timeline.feed_resources(owner_ids)
+            )
+            _schedule_image_variants(posts)
+
+        for scheduled in claimed:
+            scheduled_post_publish_lag.observe(
+                (now - scheduled.publish_at).total_seconds()
+            )
+        published += len(claimed)
+        if len(claimed) < batch_size:
+            break
+
+    return published
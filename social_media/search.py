@@ -0,0 +1,62 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q, TextField, Value
+from django.db.models.functions import Cast, Greatest, Upper
+
+# Must match the configuration used by the search_vector trigger.
+SEARCH_CONFIG = "english"
+
+
+def search_posts(queryset, text: str):
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    # ts_rank() is a real, the cursor carries a double: compare doubles
+    # so the key read back from the cursor equals the row's.
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
+
+
+def _name_expression(field: str):
+    # Same expression as the trigram indexes on the user table.
+    return Upper(Cast(f"owner__{field}", TextField()))
+
+
+def search_profiles(queryset, text: str):
+    """
+    Rank profiles by trigram word similarity of every search term to the
+    owner's first or last name.
+    """
+    queryset = queryset.annotate(
+        first_name_upper=_name_expression("first_name"),
+        last_name_upper=_name_expression("last_name"),
+    )
+    similarity = Value(0.0, output_field=FloatField())
+
+    for term in text.upper().split():
+        queryset = queryset.filter(
+            Q(first_name_upper__trigram_word_similar=term)
+            | Q(last_name_upper__trigram_word_similar=term)
+        )
+        similarity += Greatest(
+            TrigramWordSimilarity(term, "first_name_upper"),
+            TrigramWordSimilarity(term, "last_name_upper"),
+        )
+
+    return queryset.annotate(similarity=similarity).order_by(
+        "-similarity", "id"
+    )
+
+
+def autocomplete_profiles(queryset, text: str):
+    """Type-ahead: every term must prefix the owner's first or last name."""
+    for term in text.split():
+        queryset = queryset.filter(
+            Q(owner__first_name__istartswith=term)
+            | Q(owner__last_name__istartswith=term)
+        )
+
+    return queryset.order_by("owner__last_name", "owner__first_name", "id")
@@ -0,0 +1,236 @@
+import random
+import re
+from bisect import bisect_left
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from social_media import response_cache
+from social_media.counters import reconcile_counters
+from social_media.hashtags import backfill_hashtags
+from social_media.models import Comment, Like, Post, Profile
+from social_media.timeline import invalidate_feeds, rebuild_timeline
+
+Follow = Profile.following.through
+
+SEED_PASSWORD = "seed-password"
+EMAIL_DOMAIN = "seed.test"
+SEED_EMAIL_RE = rf"^user([0-9]+)@{re.escape(EMAIL_DOMAIN)}$"
+FIRST_NAMES = (
+    "Olena Taras Maria Ivan Sofia Andrii Anna Dmytro Iryna Oleh Kateryna "
+    "Mykola Yulia Petro Nadia Roman"
+).split()
+LAST_NAMES = (
+    "Shevchenko Kovalenko Bondarenko Tkachenko Kravchenko Melnyk Boyko "
+    "Oliynyk Lysenko Marchenko Rudenko Savchenko"
+).split()
+WORDS = (
+    "django python api feed photo weekend coffee travel music team release "
+    "city night sunset morning code review deploy friends family book"
+).split()
+HASHTAGS = "django python travel music photo coffee code news".split()
+
+
+class PowerLaw:
+    """
+    Draws indexes in ``range(size)`` with probability proportional to
+    ``1 / (rank + 1) ** exponent``, after shuffling which index has which
+    rank.
+    """
+
+    def __init__(self, rng, size: int, exponent: float):
+        self.rng = rng
+        self.ranks = list(range(size))
+        rng.shuffle(self.ranks)
+        self.rank_of = {index: rank for rank, index in enumerate(self.ranks)}
+        self.exponent = exponent
+        self.cumulative = list(
+            accumulate(1 / (rank + 1) ** exponent for rank in range(size))
+        )
+
+    def weight(self, index: int) -> float:
+        """How many times the average index ``index`` is drawn."""
+        probability = 1 / (self.rank_of[index] + 1) ** self.exponent
+        return probability * len(self.ranks) / self.cumulative[-1]
+
+    def draw(self) -> int:
+        value = self.rng.random() * self.cumulative[-1]
+        return self.ranks[bisect_left(self.cumulative, value)]
+
+    def sample(self, count: int, exclude: int = None) -> set:
+        """Up to ``count`` distinct indexes."""
+        count = min(count, len(self.ranks) - (exclude is not None))
+        picked = set()
+        # Heavy heads make repeated draws likely, give up after a while.
+        for _ in range(count * 4):
+            if len(picked) >= count:
+                break
+            index = self.draw()
+            if index != exclude:
+                picked.add(index)
+        return picked
+
+
+def _next_seed_index(User) -> int:
+    """One past the highest index of a seeded email, 0 before any seed."""
+    # Longer numbers are bigger, same length ones compare as text.
+    email = (
+        User.objects.filter(email__regex=SEED_EMAIL_RE)
+        .order_by(Length("email").desc(), "-email")
+        .values_list("email", flat=True)
+        .first()
+    )
+    if email is None:
+        return 0
+    return int(re.match(SEED_EMAIL_RE, email).group(1)) + 1
+
+
+def _pareto_count(rng, mean: float, alpha: float = 2.5) -> int:
+    """Skewed count with the given mean, most are small, a few are big."""
+    return round(mean * rng.paretovariate(alpha) * (alpha - 1) / alpha)
+
+
+def seed_dataset(
+    users: int,
+    posts_per_user: float = 5,
+    follows_per_user: float = 20,
+    likes_per_post: float = 5,
+    comments_per_post: float = 1,
+    exponent: float = 1.1,
+    seed: int = 0,
+    batch_size: int = 2000,
+) -> dict:
+    """
+    Insert a dataset with bulk inserts and return how many rows of each
+    kind were created.
+
+    Follows, likes and comments concentrate on popular profiles: who is
+    followed is drawn from a power law, and posts of authors with more
+    followers get more likes and comments. Counters, hashtags and
+    timelines are filled in afterwards since bulk inserts skip signals.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    User = get_user_model()
+    offset = _next_seed_index(User)
+    password = make_password(SEED_PASSWORD)
+
+    with transaction.atomic():
+        new_users = User.objects.bulk_create(
+            [
+                User(
+                    email=f"user{offset + index}@{EMAIL_DOMAIN}",
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                )
+                for index in range(users)
+            ],
+            batch_size=batch_size,
+        )
+        profiles = Profile.objects.bulk_create(
+            [
+                Profile(
+                    owner=user,
+                    gender=rng.choice(Profile.GenderChoices.values),
+                    bio=" ".join(rng.choices(WORDS, k=8)),
+                )
+                for user in new_users
+            ],
+            batch_size=batch_size,
+        )
+
+        popularity = PowerLaw(rng, len(profiles), exponent)
+        follows = []
+        for index, profile in enumerate(profiles):
+            count = _pareto_count(rng, follows_per_user)
+            for followed in popularity.sample(count, exclude=index):
+                follows.append(
+                    Follow(
+                        from_profile_id=profile.id,
+                        to_profile_id=profiles[followed].id,
+                    )
+                )
+        Follow.objects.bulk_create(
+            follows, batch_size=batch_size, ignore_conflicts=True
+        )
+
+        posts = []
+        authors = []
+        for index, user in enumerate(new_users):
+            for _ in range(_pareto_count(rng, posts_per_user)):
+                tags = rng.sample(HASHTAGS, k=rng.randint(0, 2))
+                posts.append(
+                    Post(
+                        owner=user,
+                        text=" ".join(
+                            rng.choices(WORDS, k=rng.randint(3, 30))
+                        ),
+                        hashtag=" ".join(f"#{tag}" for tag in tags) or None,
+                    )
+                )
+                authors.append(index)
+        posts = Post.objects.bulk_create(posts, batch_size=batch_size)
+
+        # created_at is set on insert, spread it over the last 30 days.
+        for post in posts:
+            post.created_at = now - timedelta(
+                seconds=rng.randint(0, 30 * 24 * 3600)
+            )
+        Post.objects.bulk_update(posts, ["created_at"], batch_size=batch_size)
+
+        likes = []
+        comments = []
+        for post, author in zip(posts, authors):
+            weight = popularity.weight(author)
+            for liker in rng.sample(
+                new_users,
+                min(len(new_users), round(likes_per_post * weight)),
+            ):
+                likes.append(Like(owner=liker, post=post))
+            for _ in range(round(comments_per_post * weight)):
+                comments.append(
+                    Comment(
+                        owner=rng.choice(new_users),
+                        post=post,
+                        text=" ".join(
+                            rng.choices(WORDS, k=rng.randint(2, 12))
+                        ),
+                    )
+                )
+        Like.objects.bulk_create(
+            likes, batch_size=batch_size, ignore_conflicts=True
+        )
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+        for start in range(0, len(posts), batch_size):
+            end = start + batch_size
+            backfill_hashtags(posts[start:end])
+        reconcile_counters(batch_size)
+
+    for user in new_users:
+        rebuild_timeline(user.id)
+    response_cache.invalidate("posts", "profiles")
+    # Reconciled counters show in the cached feeds of every user.
+    user_ids = User.objects.values_list("id", flat=True)
+    batch = []
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            invalidate_feeds(batch)
+            batch = []
+    invalidate_feeds(batch)
+
+    return {
+        "users": len(new_users),
+        "profiles": len(profiles),
+        "follows": len(follows),
+        "posts": len(posts),
+        "likes": len(likes),
+        "comments": len(comments),
+    }
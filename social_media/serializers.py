@@ -1,12 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field, inline_serializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from social_media.models import Profile, Post, Comment, Like
+from app.metrics import TimedSerializerMixin
+from social_media import response_cache
+from social_media.counters import change_counters
+from social_media.fieldsets import SparseFieldsMixin
+from social_media.images import IMAGE_VARIANTS
+from social_media.likes import liked_post_ids
+from social_media.pagination import KeysetPagination
+from social_media.models import (
+    Profile,
+    Post,
+    Comment,
+    Like,
+    Hashtag,
+    ScheduledPost,
+)
 from user.serializers import UserUpdateForProfileSerializer
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+@extend_schema_field(
+    inline_serializer(
+        "ImageVariants",
+        fields={
+            name: serializers.URLField(allow_null=True)
+            for name in IMAGE_VARIANTS
+        },
+    )
+)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the resized variants, ``None`` until they are rendered."""
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for name in IMAGE_VARIANTS:
+            path = value.get(name)
+            if path:
+                url = default_storage.url(path)
+                path = request.build_absolute_uri(url) if request else url
+            urls[name] = path or None
+        return urls
+
+
+class ProfileSummarySerializer(serializers.ModelSerializer):
+    first_name = serializers.CharField(source="owner.first_name")
+    last_name = serializers.CharField(source="owner.last_name")
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Profile
+        fields = ("id", "first_name", "last_name", "image_variants")
+
+
+class ProfileSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     owner = UserUpdateForProfileSerializer(many=False, partial=True)
+    image_variants = ImageVariantsField()
+    expandable_fields = {
+        "following": (
+            ProfileSummarySerializer,
+            {"many": True, "read_only": True},
+        ),
+    }
 
     def validate(self, attrs):
         data = super(ProfileSerializer, self).validate(attrs=attrs)
@@ -29,6 +91,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             "phone_number",
             "following",
             "image",
+            "image_variants",
         )
         read_only_fields = ("id", "following", "image")
 
@@ -51,11 +114,14 @@ class ProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProfileListSerializer(serializers.ModelSerializer):
+class ProfileListSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     first_name = serializers.CharField(source="owner.first_name")
     last_name = serializers.CharField(source="owner.last_name")
-    count_following = serializers.IntegerField(source="following.count")
-    count_followers = serializers.IntegerField(source="followers.count")
+    count_following = serializers.IntegerField(source="following_count")
+    count_followers = serializers.IntegerField(source="followers_count")
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Profile
@@ -69,16 +135,50 @@ class ProfileListSerializer(serializers.ModelSerializer):
             "count_followers",
             "count_following",
             "image",
+            "image_variants",
         )
 
 
-class ProfileImageSerializer(serializers.ModelSerializer):
+class BulkFollowSerializer(serializers.Serializer):
+    profiles = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
+class BatchIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
+class BulkLikeSerializer(serializers.Serializer):
+    posts = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
+class RelationshipSerializer(serializers.Serializer):
+    following = serializers.BooleanField()
+    followed_by = serializers.BooleanField()
+
+
+class ProfileImageSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Profile
-        fields = ("id", "image")
+        fields = ("id", "image", "image_variants")
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ("id", "text", "created_at")
@@ -90,6 +190,42 @@ class CommentCreateSerializer(CommentSerializer):
         fields = ("id", "post", "text", "created_at")
 
 
+class BulkCommentItemSerializer(serializers.Serializer):
+    post = serializers.IntegerField(min_value=1)
+    text = serializers.CharField(max_length=255)
+
+
+class BulkCommentSerializer(serializers.Serializer):
+    comments = BulkCommentItemSerializer(
+        many=True, allow_empty=False, max_length=100
+    )
+
+    def validate_comments(self, comments):
+        post_ids = {comment["post"] for comment in comments}
+        found = Post.objects.only("id").in_bulk(post_ids)
+        missing = sorted(post_ids - found.keys())
+        if missing:
+            raise ValidationError(
+                f"Posts not found: {', '.join(map(str, missing))}."
+            )
+        return comments
+
+    def create(self, validated_data):
+        owner = validated_data["owner"]
+        comments = Comment.objects.bulk_create(
+            Comment(owner=owner, post_id=item["post"], text=item["text"])
+            for item in validated_data["comments"]
+        )
+
+        # bulk_create() bypasses the Comment signals.
+        added = {}
+        for comment in comments:
+            added[comment.post_id] = added.get(comment.post_id, 0) + 1
+        change_counters(Post, "comments_count", added)
+        response_cache.invalidate(*(f"post:{post_id}" for post_id in added))
+        return comments
+
+
 class CommentDetailSerializer(CommentSerializer):
     owner = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="full_name"
@@ -100,7 +236,7 @@ class CommentDetailSerializer(CommentSerializer):
         fields = ("id", "owner", "text", "created_at")
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ("id", "post")
@@ -114,10 +250,31 @@ class LikeDetailSerializer(LikeSerializer):
         fields = ("id", "post", "like")
 
 
-class PostSerializer(serializers.ModelSerializer):
-    comments = CommentDetailSerializer(many=True, read_only=True)
-    likes = LikeDetailSerializer(many=True, read_only=True)
+class HashtagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Hashtag
+        fields = ("id", "name")
+
+
+class PostAuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ("id", "first_name", "last_name")
+
+
+class PostSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    comments = serializers.SerializerMethodField()
+    likes = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
     scheduled_time = serializers.DateTimeField(required=False)
+    comments_preview_size = 10
+    field_loads = {
+        "comments": {"only": ["comments_count"]},
+        "likes": {"only": ["likes_count"]},
+        "scheduled_time": {},
+    }
 
     class Meta:
         model = Post
@@ -127,32 +284,130 @@ class PostSerializer(serializers.ModelSerializer):
             "created_at",
             "hashtag",
             "image",
+            "image_variants",
             "comments",
             "likes",
             "scheduled_time"
         )
 
+    @classmethod
+    def comments_preview_queryset(cls, post):
+        """The newest comments, plus one to tell if there are more."""
+        return post.comments.select_related("owner").order_by(
+            "-created_at", "-id"
+        )[: cls.comments_preview_size + 1]
+
+    def _absolute_url(self, view_name, post):
+        url = reverse(view_name, kwargs={"pk": post.id})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    @extend_schema_field(
+        inline_serializer(
+            "PostCommentsPreview",
+            fields={
+                "count": serializers.IntegerField(),
+                "next": serializers.URLField(allow_null=True),
+                "results": CommentDetailSerializer(many=True),
+            },
+        )
+    )
+    def get_comments(self, obj):
+        comments = getattr(obj, "preview_comments", None)
+        if comments is None:
+            comments = list(self.comments_preview_queryset(obj))
+        next_link = None
+        if len(comments) > self.comments_preview_size:
+            comments = comments[: self.comments_preview_size]
+            next_link = KeysetPagination.link_after(
+                self._absolute_url("social_media:post-comments", obj),
+                comments[-1],
+            )
+
+        return {
+            "count": obj.comments_count,
+            "next": next_link,
+            "results": CommentDetailSerializer(comments, many=True).data,
+        }
+
+    @extend_schema_field(
+        inline_serializer(
+            "PostLikesSummary",
+            fields={
+                "count": serializers.IntegerField(),
+                "next": serializers.URLField(allow_null=True),
+            },
+        )
+    )
+    def get_likes(self, obj):
+        next_link = None
+        if obj.likes_count:
+            next_link = self._absolute_url("social_media:post-likes", obj)
+        return {"count": obj.likes_count, "next": next_link}
+
+
+class LikedByMeListSerializer(serializers.ListSerializer):
+    """Resolves ``liked_by_me`` for a whole page with a single query."""
+
+    def to_representation(self, data):
+        posts = list(data)
+        request = self.context.get("request")
+        if "liked_post_ids" in self.context:
+            # Looked up by the caller, e.g. with the async ORM.
+            self.child.liked_post_ids = self.context["liked_post_ids"]
+        elif request is not None and "liked_by_me" in self.child.fields:
+            self.child.liked_post_ids = liked_post_ids(
+                request.user, [post.id for post in posts]
+            )
+        return super().to_representation(posts)
+
 
 class PostListSerializer(PostSerializer):
     owner = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="full_name"
     )
     comments_count = serializers.IntegerField()
-    likes = serializers.IntegerField(source="likes.count")
+    likes = serializers.IntegerField(source="likes_count")
+    liked_by_me = serializers.SerializerMethodField()
+    expandable_fields = {"owner": (PostAuthorSerializer, {"read_only": True})}
+    field_loads = {
+        "owner": {
+            "only": ["owner__first_name", "owner__last_name"],
+            "select_related": ["owner"],
+        },
+        "liked_by_me": {},
+    }
 
     class Meta:
         model = Post
+        list_serializer_class = LikedByMeListSerializer
         fields = (
             "id",
             "owner",
             "text",
             "hashtag",
             "image",
+            "image_variants",
             "comments_count",
             "likes",
+            "liked_by_me",
             "created_at",
         )
 
+    def get_liked_by_me(self, obj) -> bool:
+        liked = getattr(self, "liked_post_ids", None)
+        if liked is None:
+            request = self.context.get("request")
+            if request is None:
+                return False
+            liked = liked_post_ids(request.user, [obj.id])
+        return obj.id in liked
+
+
+class LikeToggleSerializer(serializers.Serializer):
+    liked = serializers.BooleanField()
+    likes_count = serializers.IntegerField()
+
 
 class PostUpdateSerializer(PostSerializer):
     class Meta:
@@ -164,3 +419,31 @@ class PostUpdateSerializer(PostSerializer):
             "hashtag",
             "image",
         )
+
+
+def validate_future(value):
+    if value <= timezone.now():
+        raise ValidationError("The publication time must be in the future.")
+    return value
+
+
+class ScheduledPostSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    publish_at = serializers.DateTimeField(validators=[validate_future])
+
+    class Meta:
+        model = ScheduledPost
+        fields = (
+            "id",
+            "text",
+            "hashtag",
+            "image",
+            "publish_at",
+            "created_at",
+        )
+        read_only_fields = ("id", "created_at")
+
+
+class RescheduleSerializer(serializers.Serializer):
+    publish_at = serializers.DateTimeField(validators=[validate_future])
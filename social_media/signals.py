@@ -0,0 +1,331 @@
+import logging
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from social_media import response_cache, timeline
+from social_media.images import delete_variants, needs_variants
+from social_media.graph import get_graph_cache
+from social_media.hashtags import sync_hashtags
+from social_media.counters import change_counter
+from social_media.models import Comment, Like, Post, Profile, TimelineEntry
+from social_media.tasks import fan_out_post, generate_image_variants
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def increment_post_counter(sender, instance, created, **kwargs):
+    if created:
+        field = "likes_count" if sender is Like else "comments_count"
+        change_counter(Post.objects.filter(pk=instance.post_id), field, 1)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def decrement_post_counter(sender, instance, origin=None, **kwargs):
+    # Cascaded from deleting the post, its counters are gone with it.
+    if getattr(origin, "model", type(origin)) is Post:
+        return
+
+    field = "likes_count" if sender is Like else "comments_count"
+    change_counter(Post.objects.filter(pk=instance.post_id), field, -1)
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def remember_cleared_follows(sender, instance, action, reverse, **kwargs):
+    # post_clear has no pk_set, the post_clear receivers read these ids.
+    if action == "pre_clear":
+        related = instance.followers if reverse else instance.following
+        instance._cleared_profile_ids = set(
+            related.values_list("id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def update_follow_counters(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "post_clear":
+        pk_set = instance._cleared_profile_ids
+        delta = -1
+    elif action in ("post_add", "post_remove"):
+        delta = 1 if action == "post_add" else -1
+    else:
+        return
+
+    if not pk_set:
+        return
+
+    own_field, other_field = (
+        ("followers_count", "following_count")
+        if reverse
+        else ("following_count", "followers_count")
+    )
+    change_counter(
+        Profile.objects.filter(pk=instance.pk), own_field, delta * len(pk_set)
+    )
+    change_counter(Profile.objects.filter(pk__in=pk_set), other_field, delta)
+
+
+@receiver(post_save, sender=Post)
+def index_post_hashtags(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created or update_fields is None or "hashtag" in update_fields:
+        sync_hashtags(instance)
+
+
+@receiver(post_save, sender=Post)
+def push_post_to_timelines(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    # The author sees the post right away, the followers once the task
+    # ran, off the request.
+    timeline.add_own_post(instance)
+    post_id = instance.pk
+    transaction.on_commit(lambda: fan_out_post.delay(post_id))
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def sync_timelines_on_follow(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "post_clear":
+        if reverse:
+            TimelineEntry.objects.filter(
+                post__owner_id=instance.owner_id
+            ).exclude(owner_id=instance.owner_id).delete()
+        else:
+            timeline.rebuild_timeline(instance.owner_id)
+        return
+
+    if action not in ("post_add", "post_remove"):
+        return
+
+    profiles = Profile.objects.filter(id__in=pk_set)
+    if reverse:
+        # instance is followed by profiles.
+        sync = (
+            timeline.backfill_followers
+            if action == "post_add"
+            else timeline.remove_followers
+        )
+    else:
+        sync = (
+            timeline.backfill_follow
+            if action == "post_add"
+            else timeline.remove_follow
+        )
+    sync(instance, profiles)
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def sync_follow_graph_cache(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    graph_cache = get_graph_cache()
+    if graph_cache is None:
+        return
+
+    if action == "post_clear":
+        profile_ids = [instance.id, *instance._cleared_profile_ids]
+
+        def sync():
+            for profile_id in profile_ids:
+                graph_cache.forget(profile_id)
+
+    elif action in ("post_add", "post_remove"):
+        update = (
+            graph_cache.add if action == "post_add" else graph_cache.remove
+        )
+        pk_set = set(pk_set)
+
+        def sync():
+            if reverse:
+                for follower_id in pk_set:
+                    update(follower_id, [instance.id])
+            else:
+                update(instance.id, pk_set)
+
+    else:
+        return
+
+    def sync_on_commit():
+        try:
+            sync()
+        except redis.RedisError:
+            logger.warning(
+                "Could not sync the follow graph cache of profile %s",
+                instance.id,
+                exc_info=True,
+            )
+
+    transaction.on_commit(sync_on_commit)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, instance, **kwargs):
+    response_cache.invalidate("posts", f"post:{instance.id}")
+
+
+@receiver(post_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, created=False, **kwargs):
+    # New posts are fanned out by push_post_to_timelines. The entries of
+    # a deleted post cascade with it, so they are read before the delete.
+    if not created:
+        timeline.invalidate_post_feeds(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    response_cache.invalidate(f"post:{instance.post_id}")
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_like_responses(sender, instance, **kwargs):
+    response_cache.invalidate(
+        f"post:{instance.post_id}", f"viewer:{instance.owner_id}"
+    )
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_responses(sender, instance, **kwargs):
+    response_cache.invalidate("profiles", f"profile:{instance.id}")
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_owner_responses(sender, instance, update_fields, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+
+    profile_ids = Profile.objects.filter(owner=instance).values_list(
+        "id", flat=True
+    )
+    response_cache.invalidate(
+        "profiles", *[f"profile:{profile_id}" for profile_id in profile_ids]
+    )
+
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def invalidate_follow_responses(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "post_clear":
+        pk_set = instance._cleared_profile_ids
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    response_cache.invalidate(
+        "profiles",
+        f"profile:{instance.id}",
+        *[f"profile:{profile_id}" for profile_id in pk_set],
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Profile)
+def schedule_image_variants(sender, instance, update_fields, **kwargs):
+    if update_fields is not None and "image" not in update_fields:
+        return
+    if not needs_variants(instance):
+        return
+
+    if instance.image:
+        label, pk = instance._meta.label, instance.pk
+        transaction.on_commit(
+            lambda: generate_image_variants.delay(label, pk)
+        )
+    else:
+        # The image was removed, so are its variants.
+        variants = instance.image_variants
+        sender.objects.filter(pk=instance.pk).update(image_variants={})
+        instance.image_variants = {}
+        transaction.on_commit(
+            lambda: delete_variants(instance.image.storage, variants)
+        )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Profile)
+def release_image_files(sender, instance, **kwargs):
+    if not instance.image:
+        return
+
+    storage = instance.image.storage
+    name, variants = instance.image.name, instance.image_variants
+
+    def release():
+        storage.delete(name)
+        delete_variants(storage, variants)
+
+    transaction.on_commit(release)
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Profile)
+def remember_stored_image(sender, instance, **kwargs):
+    # The raw column value: reading instance.image would load a deferred
+    # field.
+    name = instance.__dict__.get("image")
+    if isinstance(name, str):
+        instance._stored_image_name = name
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Profile)
+def find_replaced_image(sender, instance, raw, update_fields, **kwargs):
+    instance._replaced_image_name = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and "image" not in update_fields:
+        return
+
+    image = instance.image
+    if image and image._committed:
+        # Unchanged, a new upload is only committed by this save.
+        return
+    if getattr(instance, "_stored_image_name", None) == "":
+        # Loaded without an image, there is nothing to release.
+        return
+
+    # A loaded name goes stale after refresh_from_db() or a concurrent
+    # update, the row decides which reference to release.
+    stored = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("image", flat=True)
+        .first()
+    )
+    if stored and stored != image.name:
+        instance._replaced_image_name = stored
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Profile)
+def release_replaced_image(sender, instance, **kwargs):
+    name = getattr(instance, "_replaced_image_name", None)
+    if "image" in instance.__dict__:
+        instance._stored_image_name = instance.image.name or ""
+    if not name:
+        return
+
+    instance._replaced_image_name = None
+    storage = instance.image.storage
+    transaction.on_commit(lambda: storage.delete(name))
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from social_media.models import MediaBlob
+
+BLOB_PREFIX = "blobs"
+BLOB_NAME_RE = re.compile(
+    rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.\w+)?$"
+)
+
+
+class HashingUploadMixin:
+    """Hash uploaded files chunk by chunk while the request streams in."""
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadMixin, MemoryFileUploadHandler
+):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadMixin, TemporaryFileUploadHandler
+):
+    pass
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the SHA-256 of their content.
+
+    Files go to ``blobs/ab/cd/<sha256><ext>`` and identical uploads share
+    one file. References are counted in ``MediaBlob`` rows, ``delete()``
+    only releases a reference and unreferenced blobs are removed by
+    ``collect_unreferenced_blobs()`` after a grace period.
+
+    Files saved under other names before the storage was introduced are
+    still read and deleted as plain files.
+    """
+
+    chunk_size = 64 * 1024
+
+    @staticmethod
+    def is_blob_name(name: str) -> bool:
+        return bool(BLOB_NAME_RE.match(name))
+
+    @staticmethod
+    def blob_name(digest: str, extension: str) -> str:
+        return (
+            f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/"
+            f"{digest}{extension.lower()}"
+        )
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once the content is hashed.
+        return name
+
+    def _save(self, name, content):
+        _, extension = os.path.splitext(name)
+        digest = getattr(content, "content_hash", None)
+
+        if digest is not None:
+            # Hashed by the upload handler: skip the write when the blob
+            # exists. The reference is taken first, so a concurrent
+            # collection either keeps the blob or has already removed it.
+            blob_name = self.blob_name(digest, extension)
+            self._add_reference(blob_name, content.size)
+            if self.exists(blob_name):
+                return blob_name
+            if hasattr(content, "temporary_file_path"):
+                self._make_directory(blob_name)
+                # Same content under the same name, a concurrent upload
+                # that moved it first is harmless.
+                file_move_safe(
+                    content.temporary_file_path(),
+                    self.path(blob_name),
+                    allow_overwrite=True,
+                )
+                os.chmod(
+                    self.path(blob_name), self.file_permissions_mode or 0o644
+                )
+            else:
+                self._store(self._write_temporary(content)[0], blob_name)
+            return blob_name
+
+        temporary_path, digest = self._write_temporary(content)
+        blob_name = self.blob_name(digest, extension)
+        self._add_reference(blob_name, content.size)
+        if self.exists(blob_name):
+            os.remove(temporary_path)
+        else:
+            self._store(temporary_path, blob_name)
+        return blob_name
+
+    def _write_temporary(self, content):
+        directory = self.path(os.path.join(BLOB_PREFIX, "tmp"))
+        os.makedirs(directory, exist_ok=True)
+
+        sha256 = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            for chunk in content.chunks(self.chunk_size):
+                sha256.update(chunk)
+                file.write(chunk)
+
+        return file.name, sha256.hexdigest()
+
+    def _make_directory(self, blob_name: str) -> None:
+        directory = os.path.dirname(self.path(blob_name))
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(
+                    directory,
+                    self.directory_permissions_mode,
+                    exist_ok=True,
+                )
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+    def _store(self, temporary_path: str, blob_name: str) -> None:
+        self._make_directory(blob_name)
+        os.chmod(temporary_path, self.file_permissions_mode or 0o644)
+        # Same content under the same name, a concurrent replace is
+        # harmless.
+        os.replace(temporary_path, self.path(blob_name))
+
+    def _add_reference(self, name: str, size: int) -> None:
+        blobs = MediaBlob.objects.filter(name=name)
+        if blobs.update(
+            ref_count=F("ref_count") + 1, updated_at=timezone.now()
+        ):
+            return
+
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(name=name, size=size)
+        except IntegrityError:
+            blobs.update(
+                ref_count=F("ref_count") + 1, updated_at=timezone.now()
+            )
+
+    def delete(self, name):
+        if not self.is_blob_name(name):
+            return super().delete(name)
+
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F("ref_count") - 1, updated_at=timezone.now()
+        )
+
+    def remove_blob(self, name: str) -> None:
+        super().delete(name)
+
+
+def collect_unreferenced_blobs(
+    grace_period: int, batch_size: int = 500, storage=default_storage
+) -> int:
+    """
+    Delete blobs without references that were released more than
+    ``grace_period`` seconds ago, returns how many were deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace_period)
+    collected = 0
+
+    while True:
+        with transaction.atomic():
+            # Row locks make a concurrent save of the same content wait
+            # and then write the file again.
+            blobs = list(
+                MediaBlob.objects.select_for_update(skip_locked=True)
+                .filter(ref_count=0, updated_at__lt=cutoff)
+                .values_list("name", flat=True)[:batch_size]
+            )
+            if not blobs:
+                break
+
+            for name in blobs:
+                storage.remove_blob(name)
+            MediaBlob.objects.filter(name__in=blobs).delete()
+
+        collected += len(blobs)
+        if len(blobs) < batch_size:
+            break
+
+    return collected
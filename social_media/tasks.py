@@ -1,27 +1,28 @@
 import base64
-import io
-import os
 
-import PIL.Image as Image
-from django.core.files import File
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
 
-from app import settings
+from social_media import images, timeline
+from social_media.counters import reconcile_counters
 from social_media.models import Post
+from social_media.scheduling import publish_due_posts
+from social_media.storage import collect_unreferenced_blobs
 
 from celery import shared_task
 
 
-def process_image_data(data_image: dict) -> None:
-    byte_data = data_image["image"].encode(encoding="utf-8")
-    base = base64.b64decode(byte_data)
-    img = Image.open(io.BytesIO(base))
-    image_path = os.path.join(settings.MEDIA_ROOT, data_image["name"])
-    img.save(image_path, format=img.format)
+@shared_task
+def publish_scheduled_posts() -> int:
+    return publish_due_posts(settings.SCHEDULED_POSTS_BATCH_SIZE)
 
 
+# Kept to drain ETA tasks queued before scheduled posts were stored in the
+# database.
 @shared_task
 def create_scheduled_post(
-    owner_id: int, post_data: dict, data_image=None
+    owner_id: int, post_data: dict, image_name=None
 ) -> None:
     data = {
         "owner_id": owner_id,
@@ -29,15 +30,39 @@ def create_scheduled_post(
         "hashtag": post_data.get("hashtag")
     }
 
-    if data_image:
-        process_image_data(data_image)
-        image_path = os.path.join(settings.MEDIA_ROOT, data_image["name"])
+    if isinstance(image_name, dict):
+        # Queued before images were staged, the image is inline base64.
+        image = ContentFile(
+            base64.b64decode(image_name["image"]), name=image_name["name"]
+        )
+        Post.objects.create(**data, image=image)
+    else:
+        # The image was stored at request time, only reference it.
+        Post.objects.create(**data, image=image_name)
 
-        with open(image_path, "rb") as file:
-            picture = File(file)
 
-            Post.objects.create(**data, image=picture)
+@shared_task
+def fan_out_post(post_id: int) -> None:
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out_post(post)
 
-        os.remove(image_path)
-    else:
-        Post.objects.create(**data)
+
+@shared_task
+def trim_timelines() -> None:
+    timeline.trim_timelines()
+
+
+@shared_task
+def reconcile_stored_counters() -> int:
+    return reconcile_counters()
+
+
+@shared_task
+def generate_image_variants(model_label: str, pk: int) -> None:
+    images.update_variants(apps.get_model(model_label), pk)
+
+
+@shared_task
+def collect_media_blobs() -> int:
+    return collect_unreferenced_blobs(settings.MEDIA_BLOB_GRACE_PERIOD)
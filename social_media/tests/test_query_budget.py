@@ -0,0 +1,348 @@
+"""
+Query budget of every endpoint in ``social_media.urls`` and ``user.urls``.
+
+Each endpoint is requested against a small and a large seeded dataset,
+with small and large pages, and must run the same number of queries on
+both: a count that grows with the data is an N+1. The counts are also
+checked against ``query_budgets.json``, run with ``QUERY_BUDGET_UPDATE=1``
+on PostgreSQL to record new or changed budgets there. Every endpoint
+must succeed and have a budget.
+"""
+import json
+import os
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from social_media import graph, urls as social_media_urls
+from social_media.models import Comment, Like, Post, Profile, ScheduledPost
+from social_media.seeding import EMAIL_DOMAIN, SEED_PASSWORD, seed_dataset
+from user import urls as user_urls
+
+BUDGET_FILE = Path(__file__).with_name("query_budgets.json")
+UPDATE_BUDGETS = bool(os.environ.get("QUERY_BUDGET_UPDATE"))
+
+# (extra seeded users, page size), the endpoints run after each step.
+SIZES = ((8, 3), (52, 25))
+METHODS = {"get", "post", "put", "patch", "delete"}
+
+
+def iter_endpoints():
+    """``(method, url name, needs pk)`` of every endpoint."""
+    for namespace, module in (
+        ("social_media", social_media_urls),
+        ("user", user_urls),
+    ):
+        for pattern in module.urlpatterns:
+            groups = pattern.pattern.regex.groupindex
+            if "format" in groups:
+                continue
+
+            callback = pattern.callback
+            actions = getattr(callback, "actions", None)
+            if actions is None:
+                view_class = getattr(callback, "cls", callback.view_class)
+                actions = {
+                    method: method
+                    for method in METHODS
+                    if hasattr(view_class, method)
+                }
+
+            # Viewsets add head to their actions once they served a GET.
+            for method in METHODS & actions.keys():
+                yield (
+                    method.upper(),
+                    f"{namespace}:{pattern.name}",
+                    "pk" in groups,
+                )
+
+
+def image_file():
+    file = BytesIO()
+    Image.new("RGB", (20, 20)).save(file, "JPEG")
+    file.name = "budget.jpg"
+    file.seek(0)
+    return file
+
+
+class Fixture:
+    """Objects of one acting user, with ``page`` related rows each."""
+
+    def __init__(self, page: int):
+        self.page = page
+        self.user = get_user_model().objects.get(
+            email=f"user0@{EMAIL_DOMAIN}"
+        )
+        self.profile = self.user.profile
+        others = list(
+            Profile.objects.exclude(id=self.profile.id).order_by(
+                "-followers_count", "id"
+            )
+        )
+        self.other_profile, self.followed_profile = others[:2]
+        graph.unfollow(self.profile, [self.other_profile.id])
+        graph.follow(self.profile, [other.id for other in others[1:page + 1]])
+        self.profile_ids = [other.id for other in others[:page]]
+        self.unfollowed_ids = [
+            other.id for other in others[page + 1:2 * page + 1]
+        ]
+
+        self.post = Post.objects.create(owner=self.user, text="Budget #django")
+        for other in others[:page]:
+            Comment.objects.create(
+                owner=other.owner, post=self.post, text="Budget comment"
+            )
+            Like.objects.create(owner=other.owner, post=self.post)
+        self.post_ids = list(
+            Post.objects.order_by("-id").values_list("id", flat=True)[:page]
+        )
+        self.comment = Comment.objects.create(
+            owner=self.user, post_id=self.post_ids[-1], text="Own comment"
+        )
+        self.like = Like.objects.create(
+            owner=self.user, post_id=self.post_ids[-1]
+        )
+        self.scheduled_post = ScheduledPost.objects.create(
+            owner=self.user,
+            text="Budget later",
+            publish_at=timezone.now() + timedelta(days=1),
+        )
+        self.new_user = get_user_model().objects.create_user(
+            email=f"budget{page}@test.com", password=SEED_PASSWORD
+        )
+
+    def object_for(self, name: str):
+        name = name.split(":")[-1]
+        objects = {
+            "profile-follow": self.other_profile,
+            "profile-unfollow": self.followed_profile,
+            "profile-relationship": self.other_profile,
+            "async-post-detail": self.post,
+        }
+        if name in objects:
+            return objects[name]
+        return {
+            "profile": self.profile,
+            "post": self.post,
+            "comment": self.comment,
+            "like": self.like,
+            "scheduledpost": self.scheduled_post,
+        }[name.split("-")[0]]
+
+    def request_for(self, method: str, name: str) -> dict:
+        """Data, format and user of a request, a page where it applies."""
+        page = self.page
+        future = (timezone.now() + timedelta(days=2)).isoformat()
+        profile_data = {
+            "gender": "Female",
+            "bio": "Budget bio",
+            "owner.first_name": "Budget",
+            "owner.last_name": "User",
+        }
+        requests = {
+            "GET social_media:post-search": {"q": "django"},
+            "GET social_media:hashtag-list": {"q": "dj"},
+            "GET social_media:post-batch": {"ids": self.post_ids},
+            "GET social_media:profile-batch": {"ids": self.profile_ids},
+            "POST social_media:profile-list": {
+                "data": profile_data,
+                "format": "multipart",
+                "user": self.new_user,
+            },
+            "PUT social_media:profile-detail": {
+                "data": profile_data,
+                "format": "multipart",
+            },
+            "PATCH social_media:profile-detail": {"bio": "Budget"},
+            "POST social_media:profile-upload-image": {
+                "data": {"image": image_file()},
+                "format": "multipart",
+            },
+            "POST social_media:profile-bulk-follow": {
+                "profiles": self.unfollowed_ids
+            },
+            "POST social_media:post-list": {
+                "text": "New budget post",
+                "hashtag": "#budget",
+            },
+            "PUT social_media:post-detail": {"text": "Edited #budget"},
+            "PATCH social_media:post-detail": {"text": "Edited"},
+            "POST social_media:post-create-comment": {"text": "Budget"},
+            "POST social_media:post-like-many": {"posts": self.post_ids},
+            "POST social_media:post-unlike-many": {"posts": self.post_ids},
+            "POST social_media:comment-list": {
+                "post": self.post.id,
+                "text": "Budget",
+            },
+            "POST social_media:comment-create-many": {
+                "comments": [
+                    {"post": post_id, "text": "Budget"}
+                    for post_id in self.post_ids
+                ]
+            },
+            "PUT social_media:comment-detail": {"text": "Edited"},
+            "PATCH social_media:comment-detail": {"text": "Edited"},
+            "POST social_media:like-list": {"post": self.post.id},
+            "POST social_media:scheduledpost-reschedule": {
+                "publish_at": future
+            },
+            "POST user:register": {
+                "data": {"email": "new@test.com", "password": "Budget12345"},
+                "user": None,
+            },
+            "POST user:login": {
+                "data": {
+                    "email": self.user.email,
+                    "password": SEED_PASSWORD,
+                },
+                "user": None,
+            },
+            "PUT user:profile": {
+                "email": self.user.email,
+                "password": "Budget12345",
+                "first_name": "Budget",
+            },
+            "PATCH user:profile": {"first_name": "Budget"},
+        }
+
+        request = requests.get(f"{method} {name}", {})
+        if "data" not in request and "user" not in request:
+            request = {"data": request}
+        request = {"format": "json", "user": self.user, **request}
+        if method == "GET":
+            request["data"] = {"limit": page, **request["data"]}
+        return request
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.clear_caches()
+
+    @staticmethod
+    def clear_caches():
+        for cache in caches.all():
+            cache.clear()
+
+    def send(self, method: str, url: str, request: dict):
+        client = APIClient(raise_request_exception=False)
+        if request["user"] is not None:
+            token, _ = Token.objects.get_or_create(user=request["user"])
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        data = request["data"]
+        if hasattr(data.get("image"), "seek"):
+            data["image"].seek(0)
+
+        with transaction.atomic():
+            self.clear_caches()
+            with CaptureQueriesContext(connection) as context:
+                if method == "GET":
+                    response = client.get(url, data)
+                else:
+                    response = getattr(client, method.lower())(
+                        url, data, format=request["format"]
+                    )
+            # Every request sees the same data.
+            transaction.set_rollback(True)
+        self.clear_caches()
+        return response, [query["sql"] for query in context.captured_queries]
+
+    def measure(self, fixture: Fixture) -> dict:
+        results = {}
+        for method, name, needs_pk in iter_endpoints():
+            kwargs = {"pk": fixture.object_for(name).pk} if needs_pk else {}
+            url = reverse(name, kwargs=kwargs)
+            request = fixture.request_for(method, name)
+
+            # The first run fills process-wide caches such as content types.
+            self.send(method, url, request)
+            response, queries = self.send(method, url, request)
+            results[f"{method} {name}"] = (response.status_code, queries)
+        return results
+
+    def test_query_counts_do_not_grow_and_stay_within_budget(self):
+        if UPDATE_BUDGETS and connection.vendor != "postgresql":
+            self.skipTest("Budgets are recorded on PostgreSQL")
+
+        runs = []
+        for index, (users, page) in enumerate(SIZES):
+            seed_dataset(
+                users=users,
+                posts_per_user=3,
+                follows_per_user=3,
+                likes_per_post=2,
+                seed=index,
+            )
+            runs.append(self.measure(Fixture(page)))
+
+        budgets = {}
+        if BUDGET_FILE.exists():
+            budgets = json.loads(BUDGET_FILE.read_text())
+
+        small, large = runs
+        for endpoint, (status_code, queries) in sorted(large.items()):
+            with self.subTest(endpoint):
+                small_status_code, small_queries = small[endpoint]
+                for code in (small_status_code, status_code):
+                    if code >= 500 and connection.vendor != "postgresql":
+                        self.skipTest(
+                            f"{endpoint} needs PostgreSQL, got {code}"
+                        )
+                    # A failed request skips the queries it should measure.
+                    self.assertTrue(
+                        200 <= code < 300, f"{endpoint} returned {code}"
+                    )
+
+                self.assertEqual(
+                    len(queries),
+                    len(small_queries),
+                    self.report(
+                        f"{endpoint} ran {len(small_queries)} queries on the "
+                        f"small dataset and {len(queries)} on the large one",
+                        queries,
+                    ),
+                )
+
+                if UPDATE_BUDGETS:
+                    budgets[endpoint] = len(queries)
+                    continue
+
+                if endpoint not in budgets:
+                    self.fail(
+                        f"{endpoint} has no budget, record it with "
+                        "QUERY_BUDGET_UPDATE=1"
+                    )
+                self.assertLessEqual(
+                    len(queries),
+                    budgets[endpoint],
+                    self.report(
+                        f"{endpoint} ran {len(queries)} queries, its "
+                        f"budget is {budgets[endpoint]}",
+                        queries,
+                    ),
+                )
+
+        if UPDATE_BUDGETS:
+            BUDGET_FILE.write_text(
+                json.dumps(budgets, indent=2, sort_keys=True) + "\n"
+            )
+
+    @staticmethod
+    def report(message: str, queries) -> str:
+        lines = [f"{message}:"]
+        lines.extend(
+            f"{number}. {sql}" for number, sql in enumerate(queries, 1)
+        )
+        return "\n".join(lines)
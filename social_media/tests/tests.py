@@ -1,19 +1,63 @@
+import hashlib
+import json
 import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
 
+from celery import current_app
+from celery.app.task import Context
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from prometheus_client import REGISTRY, CollectorRegistry
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from app import settings
+from app.db_router import pin_key, replica_pool
+from app.renderers import ORJSONRenderer
+from app.task_metrics import QueueDepthCollector, task_lag_seconds
 from social_media.serializers import ProfileListSerializer
-from social_media.models import Profile, Post
+from social_media.counters import reconcile_counters
+from social_media.models import (
+    Profile,
+    Post,
+    Comment,
+    Like,
+    TimelineEntry,
+    ScheduledPost,
+    MediaBlob,
+)
+from social_media.images import IMAGE_VARIANTS
+from social_media.scheduling import publish_due_posts
+from social_media.seeding import seed_dataset
+from social_media.storage import collect_unreferenced_blobs
+from social_media.tasks import (
+    fan_out_post,
+    generate_image_variants,
+    reconcile_stored_counters,
+    trim_timelines,
+)
 
 PROFILE_URL = reverse("social_media:profile-list")
 POST_URL = reverse("social_media:post-list")
 COMMENT_URL = reverse("social_media:comment-list")
 LIKE_URL = reverse("social_media:comment-list")
+SCHEDULED_POST_URL = reverse("social_media:scheduledpost-list")
 
 
 class UnauthenticatedPlayApiTests(TestCase):
@@ -29,6 +73,7 @@ class UnauthenticatedPlayApiTests(TestCase):
 
 class AuthenticatedProfileApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="testfortest@test.com",
@@ -64,6 +109,16 @@ class AuthenticatedProfileApiTests(TestCase):
         self.assertIn(serializer1.data, response.data["results"])
         self.assertNotIn(serializer2.data, response.data["results"])
 
+    def test_profile_list_is_not_distinct(self):
+        self.profile1.following.add(self.profile2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(PROFILE_URL, {"last_name": "Doe"})
+
+        self.assertEqual(response.data["count"], 1)
+        self.assertNotIn(
+            "DISTINCT", "\n".join(query["sql"] for query in queries)
+        )
+
     def test_upload_image(self):
         path = os.path.join("social_media", "tests", "test.jpg")
         image_data = {"image": open(path, "rb")}
@@ -74,14 +129,14 @@ class AuthenticatedProfileApiTests(TestCase):
 
     def test_follow_action(self):
         url = reverse("social_media:profile-follow", kwargs={"pk": self.profile2.id})
-        response = self.client.get(url)
+        response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["detail"], "You are now following this user.")
         self.assertTrue(self.user.profile.following.filter(id=self.profile2.id).exists())
 
     def test_follow_self_action(self):
         url = reverse("social_media:profile-follow", kwargs={"pk": self.profile1.id})
-        response = self.client.get(url)
+        response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["detail"], "You cannot follow yourself.")
 
@@ -89,7 +144,7 @@ class AuthenticatedProfileApiTests(TestCase):
     def test_follow_already_following_action(self):
         self.user.profile.following.add(self.profile2)
         url = reverse("social_media:profile-follow", kwargs={"pk": self.profile2.id})
-        response = self.client.get(url)
+        response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["detail"], "You are already following this user.")
 
@@ -97,8 +152,1593 @@ class AuthenticatedProfileApiTests(TestCase):
     def test_unfollow_action(self):
         self.user.profile.following.add(self.profile2)
         url = reverse("social_media:profile-unfollow", kwargs={"pk": self.profile2.id})
-        response = self.client.get(url)
+        response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["detail"], "You have unfollowed this user")
         # Перевірка, чи користувач вже не є фоловером profile2
         self.assertFalse(self.user.profile.following.filter(id=self.profile2.id).exists())
+
+    def test_follow_requires_post(self):
+        url = reverse("social_media:profile-follow", kwargs={"pk": self.profile2.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_bulk_follow_action(self):
+        user3 = get_user_model().objects.create_user(
+            email="third@test.com", password="Test122345"
+        )
+        profile3 = Profile.objects.create(owner=user3, gender="Male")
+        self.user.profile.following.add(self.profile2)
+
+        url = reverse("social_media:profile-bulk-follow")
+        response = self.client.post(
+            url,
+            {"profiles": [self.profile1.id, self.profile2.id, profile3.id, 0]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            url,
+            {"profiles": [self.profile1.id, self.profile2.id, profile3.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["followed"], [profile3.id])
+        profile3.refresh_from_db()
+        self.assertEqual(profile3.followers_count, 1)
+
+    def test_relationship_action(self):
+        self.profile2.following.add(self.profile1)
+        url = reverse("social_media:profile-relationship", kwargs={"pk": self.profile2.id})
+        response = self.client.get(url)
+        self.assertEqual(response.data, {"following": False, "followed_by": True})
+
+    def test_relationship_of_missing_profile(self):
+        url = reverse("social_media:profile-relationship", kwargs={"pk": 0})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(FOLLOW_GRAPH_REDIS_URL="redis://127.0.0.1:1/0")
+    def test_relationship_without_graph_cache_reads_database(self):
+        self.profile2.following.add(self.profile1)
+        url = reverse(
+            "social_media:profile-relationship",
+            kwargs={"pk": self.profile2.id},
+        )
+        with self.assertLogs("social_media.graph", "WARNING"):
+            response = self.client.get(url)
+        self.assertEqual(
+            response.data, {"following": False, "followed_by": True}
+        )
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="reader@test.com",
+            password="Test122345",
+            first_name="Reader",
+            last_name="Tester"
+        )
+        self.author = get_user_model().objects.create_user(
+            email="author@test.com",
+            password="Test122345",
+            first_name="Author",
+            last_name="Tester"
+        )
+        self.profile = Profile.objects.create(owner=self.user, gender="Male")
+        self.author_profile = Profile.objects.create(
+            owner=self.author, gender="Female"
+        )
+        self.client.force_authenticate(self.user)
+
+    def feed_ids(self):
+        response = self.client.get(POST_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["id"] for post in response.data["results"]]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.profile.following.add(self.author_profile)
+        with self.captureOnCommitCallbacks():
+            post = Post.objects.create(owner=self.author, text="Hello")
+        own_post = Post.objects.create(owner=self.user, text="Mine")
+
+        # Only the author's entry is added in the request.
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.author, post=post).exists()
+        )
+        self.assertEqual(self.feed_ids(), [own_post.id])
+
+        fan_out_post(post.id)
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed_ids(), [own_post.id, post.id])
+
+    def test_new_followers_are_backfilled_together(self):
+        post = Post.objects.create(owner=self.author, text="Earlier")
+        other = Profile.objects.create(
+            owner=get_user_model().objects.create_user(
+                email="other@test.com", password="Test122345"
+            )
+        )
+
+        with self.assertNumQueries(8):
+            # existing follows, insert, two counters, the followers, the
+            # author's posts, their entries and trimming, for any number
+            # of followers
+            self.author_profile.followers.add(self.profile, other)
+        self.assertEqual(
+            set(
+                TimelineEntry.objects.filter(post=post).values_list(
+                    "owner_id", flat=True
+                )
+            ),
+            {self.author.id, self.user.id, other.owner_id},
+        )
+
+        self.author_profile.followers.remove(self.profile, other)
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.filter(post=post).values_list(
+                    "owner_id", flat=True
+                )
+            ),
+            [self.author.id],
+        )
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_follow_backfills_and_unfollow_removes_posts(self):
+        post = Post.objects.create(owner=self.author, text="Earlier")
+        self.assertEqual(self.feed_ids(), [])
+
+        self.profile.following.add(self.author_profile)
+        self.assertEqual(self.feed_ids(), [post.id])
+
+        self.profile.following.remove(self.author_profile)
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_posts_are_pulled_at_read_time(self):
+        self.profile.following.add(self.author_profile)
+        post = Post.objects.create(owner=self.author, text="Popular")
+
+        self.assertFalse(
+            TimelineEntry.objects.filter(owner=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_feed_is_keyed_on_timeline_entries(self):
+        posts = [
+            Post.objects.create(owner=self.user, text=f"Post {number}")
+            for number in range(3)
+        ]
+        # Entry order decides, not the post columns.
+        for position, post in enumerate(posts):
+            TimelineEntry.objects.filter(post=post).update(
+                created_at=post.created_at + timedelta(days=position)
+            )
+        TimelineEntry.objects.filter(post=posts[1]).update(
+            created_at=posts[0].created_at - timedelta(days=1)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            ids = self.feed_ids()
+        sql = "\n".join(query["sql"] for query in queries)
+
+        self.assertEqual(ids, [posts[2].id, posts[0].id, posts[1].id])
+        self.assertIn('"social_media_timelineentry"."id" AS "feed_id"', sql)
+
+        next_page = self.client.get(POST_URL, {"limit": 2}).data["next"]
+        response = self.client.get(next_page)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]], [posts[1].id]
+        )
+
+    def test_rebuild_timelines_command(self):
+        self.profile.following.add(self.author_profile)
+        post = Post.objects.create(owner=self.author, text="Hello")
+        TimelineEntry.objects.all().delete()
+
+        call_command("rebuild_timelines", stdout=StringIO())
+
+        self.assertEqual(self.feed_ids(), [post.id])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="pager@test.com",
+            password="Test122345",
+            first_name="Page",
+            last_name="Tester"
+        )
+        Profile.objects.create(owner=self.user, gender="Male")
+        self.client.force_authenticate(self.user)
+        for number in range(25):
+            Post.objects.create(owner=self.user, text=f"Post {number}")
+        # Identical timestamps force the id tie-breaker to be used.
+        tied_ids = Post.objects.order_by("id").values("id")[:11]
+        created_at = Post.objects.order_by("id").first().created_at
+        Post.objects.filter(id__in=tied_ids).update(created_at=created_at)
+        TimelineEntry.objects.filter(post_id__in=tied_ids).update(
+            created_at=created_at
+        )
+        self.expected = list(
+            Post.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def test_pages_follow_created_at_and_id_without_count(self):
+        ids = []
+        url = f"{POST_URL}?limit=10"
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            pages.append(response.data)
+            ids += [post["id"] for post in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        response = self.client.get(pages[1]["previous"])
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            self.expected[:10],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(POST_URL, {"cursor": "broken"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StoredCountersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="counter@test.com",
+            password="Test122345",
+            first_name="Count",
+            last_name="Tester"
+        )
+        self.user2 = get_user_model().objects.create_user(
+            email="counted@test.com",
+            password="Test122345",
+            first_name="Counted",
+            last_name="Tester"
+        )
+        self.profile = Profile.objects.create(owner=self.user, gender="Male")
+        self.profile2 = Profile.objects.create(
+            owner=self.user2, gender="Female"
+        )
+        self.post = Post.objects.create(owner=self.user, text="Counted")
+        self.client.force_authenticate(self.user)
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_like_and_comment_counters(self):
+        self.client.post(
+            reverse("social_media:like-list"), {"post": self.post.id}
+        )
+        self.client.post(
+            reverse(
+                "social_media:post-create-comment", kwargs={"pk": self.post.id}
+            ),
+            {"text": "Nice"},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+        self.client.post(
+            reverse("social_media:like-list"), {"post": self.post.id}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+        response = self.client.get(POST_URL)
+        self.assertEqual(response.data["results"][0]["comments_count"], 1)
+        self.assertEqual(response.data["results"][0]["likes"], 0)
+
+    def test_follow_counters(self):
+        self.profile.following.add(self.profile2)
+        self.profile.refresh_from_db()
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.profile.following_count, 1)
+        self.assertEqual(self.profile2.followers_count, 1)
+
+        self.profile2.followers.clear()
+        self.profile.refresh_from_db()
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.profile.following_count, 0)
+        self.assertEqual(self.profile2.followers_count, 0)
+
+    def test_reconcile_counters_repairs_drift(self):
+        self.profile.following.add(self.profile2)
+        Comment.objects.create(owner=self.user, post=self.post, text="Hi")
+        Post.objects.update(comments_count=7, likes_count=3)
+        Profile.objects.update(followers_count=0, following_count=0)
+
+        reconcile_counters(batch_size=1)
+
+        self.post.refresh_from_db()
+        self.profile.refresh_from_db()
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.profile.following_count, 1)
+        self.assertEqual(self.profile2.followers_count, 1)
+
+
+class HashtagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="tagger@test.com",
+            password="Test122345",
+            first_name="Tag",
+            last_name="Tester"
+        )
+        self.client.force_authenticate(self.user)
+        self.django_post = Post.objects.create(
+            owner=self.user, text="Web", hashtag="#Django #python"
+        )
+        self.python_post = Post.objects.create(
+            owner=self.user, text="Snake", hashtag="python"
+        )
+
+    def filtered_ids(self, hashtag):
+        response = self.client.get(POST_URL, {"hashtag": hashtag})
+        return {post["id"] for post in response.data["results"]}
+
+    def test_filter_by_exact_and_prefix_hashtag(self):
+        self.assertEqual(self.filtered_ids("#django"), {self.django_post.id})
+        self.assertEqual(
+            self.filtered_ids("Python"),
+            {self.django_post.id, self.python_post.id},
+        )
+        self.assertEqual(self.filtered_ids("dja*"), {self.django_post.id})
+        self.assertEqual(self.filtered_ids("djan"), set())
+
+    def test_prefix_matching_several_hashtags_lists_post_once(self):
+        post = Post.objects.create(
+            owner=self.user, text="Both", hashtag="#pytest #pythonic"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(POST_URL, {"hashtag": "py*"})
+        sql = "\n".join(query["sql"] for query in queries)
+
+        ids = [post["id"] for post in response.data["results"]]
+        self.assertEqual(ids.count(post.id), 1)
+        self.assertNotIn("DISTINCT", sql)
+
+    def test_edited_hashtags_are_reindexed(self):
+        self.python_post.hashtag = "django"
+        self.python_post.save()
+
+        self.assertEqual(
+            self.filtered_ids("django"),
+            {self.django_post.id, self.python_post.id},
+        )
+        self.assertEqual(self.filtered_ids("python"), {self.django_post.id})
+
+    def test_autocomplete(self):
+        response = self.client.get(
+            reverse("social_media:hashtag-list"), {"q": "#Py"}
+        )
+        self.assertEqual(
+            [hashtag["name"] for hashtag in response.data], ["python"]
+        )
+
+    def test_backfill_hashtags_command(self):
+        Post.hashtags.through.objects.all().delete()
+
+        call_command("backfill_hashtags", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            set(self.django_post.hashtags.values_list("name", flat=True)),
+            {"django", "python"},
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class PostSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="searcher@test.com",
+            password="Test122345",
+            first_name="Search",
+            last_name="Tester"
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("social_media:post-search")
+
+    def test_search_ranks_and_paginates(self):
+        tagged = Post.objects.create(
+            owner=self.user, text="Release notes", hashtag="django"
+        )
+        mentioned = Post.objects.create(
+            owner=self.user, text="Deploying django apps"
+        )
+        Post.objects.create(owner=self.user, text="Something else")
+
+        response = self.client.get(self.url, {"q": "django", "limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], tagged.id)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [mentioned.id],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_tied_ranks_page_without_repeats_or_gaps(self):
+        posts = [
+            Post.objects.create(owner=self.user, text=f"Django note {number}")
+            for number in range(5)
+        ]
+
+        ids = []
+        url = f"{self.url}?q=django&limit=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [post["id"] for post in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, [post.id for post in reversed(posts)])
+
+    def test_query_is_required(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProfileSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        names = [("Jonathan", "Doe"), ("Jane", "Doering"), ("Joe", "Black")]
+        self.profiles = []
+        for number, (first_name, last_name) in enumerate(names):
+            user = get_user_model().objects.create_user(
+                email=f"person{number}@test.com",
+                password="Test122345",
+                first_name=first_name,
+                last_name=last_name
+            )
+            self.profiles.append(
+                Profile.objects.create(owner=user, gender="Male")
+            )
+        self.client.force_authenticate(user)
+
+    def result_ids(self, params):
+        response = self.client.get(PROFILE_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [profile["id"] for profile in response.data["results"]]
+
+    def test_autocomplete_matches_every_term_by_prefix(self):
+        self.assertEqual(
+            self.result_ids({"autocomplete": "do"}),
+            [self.profiles[0].id, self.profiles[1].id],
+        )
+        self.assertEqual(
+            self.result_ids({"autocomplete": "ja doe"}),
+            [self.profiles[1].id],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_search_ranks_by_similarity(self):
+        self.assertEqual(
+            self.result_ids({"search": "jonatan doe"})[0],
+            self.profiles[0].id,
+        )
+
+
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="liker@test.com",
+            password="Test122345",
+            first_name="Like",
+            last_name="Tester"
+        )
+        self.client.force_authenticate(self.user)
+        self.liked = Post.objects.create(owner=self.user, text="Liked")
+        self.other = Post.objects.create(owner=self.user, text="Other")
+        Like.objects.create(owner=self.user, post=self.liked)
+
+    def test_feed_resolves_liked_by_me_with_one_query(self):
+        response = self.client.get(POST_URL)
+        liked_by_me = {
+            post["id"]: post["liked_by_me"]
+            for post in response.data["results"]
+        }
+        self.assertEqual(
+            liked_by_me, {self.liked.id: True, self.other.id: False}
+        )
+
+        Post.objects.create(owner=self.user, text="More")
+        with self.assertNumQueries(3):
+            # timeline pull authors, page, liked posts of the page
+            self.client.get(POST_URL)
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_toggle_like(self):
+        url = reverse("social_media:post-like", kwargs={"pk": self.other.id})
+
+        response = self.client.post(url)
+        self.assertEqual(response.data, {"liked": True, "likes_count": 1})
+        response = self.client.post(url)
+        self.assertEqual(response.data, {"liked": False, "likes_count": 0})
+        self.assertFalse(
+            Like.objects.filter(owner=self.user, post=self.other).exists()
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_toggle_like_missing_post(self):
+        url = reverse("social_media:post-like", kwargs={"pk": 0})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_like_list_create_toggles(self):
+        url = reverse("social_media:like-list")
+
+        response = self.client.post(url, {"post": self.other.id})
+        self.assertEqual(response.data, {"liked": True, "likes_count": 1})
+        response = self.client.post(url, {"post": self.other.id})
+        self.assertEqual(response.data, {"liked": False, "likes_count": 0})
+        response = self.client.post(url, {"post": 0})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_likes_cannot_move_to_another_post(self):
+        like = Like.objects.get(owner=self.user, post=self.liked)
+        url = reverse("social_media:like-detail", kwargs={"pk": like.id})
+
+        for method in (self.client.put, self.client.patch):
+            response = method(url, {"post": self.other.id})
+            self.assertEqual(
+                response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        like.refresh_from_db()
+        self.assertEqual(like.post, self.liked)
+
+
+class PostDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="reader2@test.com",
+            password="Test122345",
+            first_name="Detail",
+            last_name="Tester"
+        )
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(owner=self.user, text="Viral")
+        self.comments = [
+            Comment.objects.create(
+                owner=self.user, post=self.post, text=f"Comment {number}"
+            )
+            for number in range(12)
+        ]
+        Like.objects.create(owner=self.user, post=self.post)
+        self.url = reverse("social_media:post-detail", kwargs={"pk": self.post.id})
+
+    def test_detail_embeds_first_comments_and_like_count(self):
+        response = self.client.get(self.url)
+        comments = response.data["comments"]
+
+        self.assertEqual(comments["count"], 12)
+        self.assertEqual(
+            [comment["id"] for comment in comments["results"]],
+            [comment.id for comment in self.comments[::-1][:10]],
+        )
+        self.assertEqual(response.data["likes"]["count"], 1)
+
+        response = self.client.get(comments["next"])
+        self.assertEqual(
+            [comment["id"] for comment in response.data["results"]],
+            [self.comments[1].id, self.comments[0].id],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_post_likes_endpoint(self):
+        response = self.client.get(self.client.get(self.url).data["likes"]["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["like"], "Detail Tester")
+
+    def test_comments_and_likes_of_missing_post(self):
+        quiet = Post.objects.create(owner=self.user, text="Quiet")
+        for action in ("comments", "likes"):
+            url = reverse(f"social_media:post-{action}", kwargs={"pk": quiet.id})
+            self.assertEqual(self.client.get(url).data["results"], [])
+
+            for pk in (0, "abc"):
+                url = reverse(f"social_media:post-{action}", kwargs={"pk": pk})
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="cached@test.com",
+            password="Test122345",
+            first_name="Cached",
+            last_name="Tester"
+        )
+        self.profile = Profile.objects.create(owner=self.user, gender="Male")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(owner=self.user, text="Cached")
+        self.url = reverse("social_media:post-detail", kwargs={"pk": self.post.id})
+
+    def test_repeated_read_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["text"], "Cached")
+
+    def test_comment_invalidates_post_detail(self):
+        self.client.get(self.url)
+        Comment.objects.create(owner=self.user, post=self.post, text="New")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["comments"]["count"], 1)
+
+    def test_like_invalidates_feed(self):
+        feed = self.client.get(POST_URL).data["results"]
+        self.assertFalse(feed[0]["liked_by_me"])
+
+        Like.objects.create(owner=self.user, post=self.post)
+
+        feed = self.client.get(POST_URL).data["results"]
+        self.assertTrue(feed[0]["liked_by_me"])
+        self.assertEqual(feed[0]["likes"], 1)
+
+    def test_post_edit_and_delete_invalidate_follower_feeds(self):
+        follower = get_user_model().objects.create_user(
+            email="follower@test.com", password="Test122345"
+        )
+        Profile.objects.create(
+            owner=follower, gender="Female"
+        ).following.add(self.profile)
+        client = APIClient()
+        client.force_authenticate(follower)
+        self.assertEqual(client.get(POST_URL).data["results"][0]["text"], "Cached")
+
+        self.post.text = "Edited"
+        self.post.save()
+        self.assertEqual(client.get(POST_URL).data["results"][0]["text"], "Edited")
+
+        self.post.delete()
+        self.assertEqual(client.get(POST_URL).data["results"], [])
+
+    def test_follow_invalidates_profile(self):
+        other = Profile.objects.create(
+            owner=get_user_model().objects.create_user(
+                email="followed@test.com", password="Test122345"
+            ),
+            gender="Female",
+        )
+        url = reverse(
+            "social_media:profile-detail", kwargs={"pk": self.profile.id}
+        )
+        self.client.get(url)
+
+        self.client.post(
+            reverse("social_media:profile-follow", kwargs={"pk": other.id})
+        )
+        self.assertEqual(self.client.get(url).data["following"], [other.id])
+
+    @override_settings(RESPONSE_CACHE_DISABLED_ENDPOINTS=["post-retrieve"])
+    def test_disabled_endpoint_is_not_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+class ScheduledPostTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="scheduler@test.com",
+            password="Test122345",
+            first_name="Scheduler",
+            last_name="Tester"
+        )
+        self.client.force_authenticate(self.user)
+
+    def image_upload(self):
+        content = BytesIO()
+        Image.new("RGB", (10, 10)).save(content, format="PNG")
+        return SimpleUploadedFile(
+            "photo.png", content.getvalue(), content_type="image/png"
+        )
+
+    def schedule(self, **data):
+        response = self.client.post(
+            POST_URL,
+            {"text": "Later", "scheduled_time": "2999-01-01T10:00", **data},
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return ScheduledPost.objects.get(
+            pk=response.data["scheduled_post"]["id"]
+        )
+
+    def test_due_posts_are_published_in_batches(self):
+        scheduled = self.schedule(image=self.image_upload())
+        self.schedule(hashtag="later")
+        self.schedule()
+        self.assertTrue(default_storage.exists(scheduled.image.name))
+        self.assertEqual(publish_due_posts(), 0)
+
+        lag_count = REGISTRY.get_sample_value(
+            "scheduled_post_publish_lag_seconds_count"
+        )
+        lag_sum = REGISTRY.get_sample_value(
+            "scheduled_post_publish_lag_seconds_sum"
+        )
+        follower = get_user_model().objects.create_user(
+            email="follower@test.com", password="Test122345"
+        )
+        Profile.objects.create(owner=follower).following.add(
+            Profile.objects.create(owner=self.user)
+        )
+        ScheduledPost.objects.update(
+            publish_at=timezone.now() - timedelta(minutes=1)
+        )
+        variant_labels = {"task": generate_image_variants.name}
+        variants_sent = REGISTRY.get_sample_value(
+            "celery_task_payload_bytes_count", variant_labels
+        ) or 0
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publish_due_posts(batch_size=2), 3)
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "scheduled_post_publish_lag_seconds_count"
+            ),
+            lag_count + 3,
+        )
+        self.assertGreaterEqual(
+            REGISTRY.get_sample_value("scheduled_post_publish_lag_seconds_sum"),
+            lag_sum + 180,
+        )
+
+        self.assertFalse(ScheduledPost.objects.exists())
+        self.assertEqual(Post.objects.count(), 3)
+        post = Post.objects.get(image=scheduled.image.name)
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user, post=post).exists()
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(owner=follower).count(), 3
+        )
+        self.assertTrue(
+            Post.objects.filter(hashtags__name="later").exists()
+        )
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "celery_task_payload_bytes_count", variant_labels
+            ),
+            variants_sent + 1,
+        )
+
+    def test_list_reschedule_and_cancel(self):
+        scheduled = self.schedule(image=self.image_upload())
+        url = reverse(
+            "social_media:scheduledpost-detail", kwargs={"pk": scheduled.id}
+        )
+
+        response = self.client.get(SCHEDULED_POST_URL)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [scheduled.id]
+        )
+
+        response = self.client.post(
+            f"{url}reschedule/", {"publish_at": "2998-01-01T10:00"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        scheduled.refresh_from_db()
+        self.assertEqual(scheduled.publish_at.year, 2998)
+
+        response = self.client.post(
+            f"{url}reschedule/", {"publish_at": "2000-01-01T10:00"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(ScheduledPost.objects.exists())
+        self.assertEqual(
+            MediaBlob.objects.get(name=scheduled.image.name).ref_count, 0
+        )
+
+    def test_other_users_scheduled_posts_are_hidden(self):
+        scheduled = self.schedule()
+        other = get_user_model().objects.create_user(
+            email="other-scheduler@test.com", password="Test122345"
+        )
+        self.client.force_authenticate(other)
+
+        url = reverse(
+            "social_media:scheduledpost-detail", kwargs={"pk": scheduled.id}
+        )
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="photographer@test.com",
+            password="Test122345",
+            first_name="Photo",
+            last_name="Grapher"
+        )
+        self.client.force_authenticate(self.user)
+
+        content = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        Image.new("RGB", (2000, 1000)).save(content, format="JPEG", exif=exif)
+        self.post = Post.objects.create(
+            owner=self.user,
+            text="Photo",
+            image=SimpleUploadedFile("photo.jpg", content.getvalue()),
+        )
+
+    def test_variants_are_resized_webp_without_metadata(self):
+        generate_image_variants(Post._meta.label, self.post.id)
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.image_variants["source"], self.post.image.name)
+        for name, size in IMAGE_VARIANTS.items():
+            with default_storage.open(self.post.image_variants[name]) as file:
+                variant = Image.open(file)
+                self.assertEqual(variant.format, "WEBP")
+                self.assertEqual(max(variant.size), size)
+                self.assertEqual(len(variant.getexif()), 0)
+
+    def test_serializers_return_variant_urls(self):
+        url = reverse("social_media:post-detail", kwargs={"pk": self.post.id})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["image_variants"],
+            {"thumbnail": None, "feed": None, "full": None},
+        )
+
+        generate_image_variants(Post._meta.label, self.post.id)
+
+        variants = self.client.get(url).data["image_variants"]
+        self.assertTrue(variants["thumbnail"].endswith(".webp"))
+        self.assertTrue(variants["feed"].startswith("http://testserver/"))
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="uploader@test.com",
+            password="Test122345",
+            first_name="Up",
+            last_name="Loader"
+        )
+        self.client.force_authenticate(self.user)
+        content = BytesIO()
+        Image.new("RGB", (10, 10)).save(content, format="PNG")
+        self.image = content.getvalue()
+
+    def upload(self):
+        response = self.client.post(
+            POST_URL,
+            {
+                "text": "Upload",
+                "image": SimpleUploadedFile("photo.PNG", self.image),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=response.data["id"])
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.upload(), self.upload()
+        digest = hashlib.sha256(self.image).hexdigest()
+
+        self.assertEqual(
+            first.image.name, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.png"
+        )
+        self.assertEqual(second.image.name, first.image.name)
+        blob = MediaBlob.objects.get(name=first.image.name)
+        self.assertEqual((blob.ref_count, blob.size), (2, len(self.image)))
+
+    def test_released_blobs_are_collected_after_grace_period(self):
+        post = self.upload()
+        default_storage.delete(post.image.name)
+
+        self.assertEqual(collect_unreferenced_blobs(grace_period=60), 0)
+        self.assertTrue(default_storage.exists(post.image.name))
+
+        self.assertEqual(collect_unreferenced_blobs(grace_period=-1), 1)
+        self.assertFalse(default_storage.exists(post.image.name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replaced_and_cleared_images_release_their_blobs(self):
+        post = self.upload()
+        first_name = post.image.name
+        content = BytesIO()
+        Image.new("RGB", (20, 20)).save(content, format="PNG")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("social_media:post-detail", args=[post.id]),
+                {"image": SimpleUploadedFile("new.png", content.getvalue())},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post.refresh_from_db()
+        self.assertEqual(MediaBlob.objects.get(name=first_name).ref_count, 0)
+        self.assertEqual(
+            MediaBlob.objects.get(name=post.image.name).ref_count, 1
+        )
+
+        second_name = post.image.name
+        post.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(MediaBlob.objects.get(name=second_name).ref_count, 0)
+
+    def test_migrate_media_storage_command(self):
+        legacy_name = "uploads/posts/legacy.png"
+        path = os.path.join(default_storage.location, legacy_name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as file:
+            file.write(self.image)
+        first = Post.objects.create(owner=self.user, text="Old")
+        second = Post.objects.create(owner=self.user, text="Old too")
+        Post.objects.update(image=legacy_name)
+
+        call_command("migrate_media_storage", stdout=StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(default_storage.is_blob_name(first.image.name))
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(
+            MediaBlob.objects.get(name=first.image.name).ref_count, 2
+        )
+        self.assertFalse(os.path.exists(path))
+
+
+class BatchEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="batch@test.com",
+            password="Test122345",
+            first_name="Batch",
+            last_name="Tester",
+        )
+        self.client.force_authenticate(self.user)
+        self.profile = Profile.objects.create(owner=self.user)
+        self.posts = [
+            Post.objects.create(owner=self.user, text=f"Post {number}")
+            for number in range(3)
+        ]
+        Like.objects.create(owner=self.user, post=self.posts[1])
+
+    def test_batch_posts_keep_requested_order(self):
+        missing_id = self.posts[2].id + 100
+        first, second, third = (post.id for post in self.posts)
+        ids = [third, first, missing_id, second]
+        with self.assertNumQueries(2):
+            # posts by id, liked posts of the batch
+            response = self.client.get(
+                reverse("social_media:post-batch"), {"ids": ids}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [third, first, second],
+        )
+        self.assertEqual(
+            [post["liked_by_me"] for post in response.data["results"]],
+            [False, False, True],
+        )
+        self.assertEqual(response.data["missing"], [missing_id])
+
+    def test_batch_profiles(self):
+        response = self.client.get(
+            reverse("social_media:profile-batch"),
+            {"ids": [self.profile.id, self.profile.id + 1]},
+        )
+        self.assertEqual(
+            [profile["id"] for profile in response.data["results"]],
+            [self.profile.id],
+        )
+        self.assertEqual(response.data["missing"], [self.profile.id + 1])
+
+    def test_batch_limits_ids(self):
+        url = reverse("social_media:post-batch")
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        response = self.client.get(url, {"ids": list(range(1, 102))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_comments(self):
+        url = reverse("social_media:comment-create-many")
+        comments = [
+            {"post": self.posts[0].id, "text": "First"},
+            {"post": self.posts[0].id, "text": "Second"},
+            {"post": self.posts[1].id, "text": "Third"},
+        ]
+        response = self.client.post(
+            url, {"comments": comments}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [comment["text"] for comment in response.data],
+            ["First", "Second", "Third"],
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].id).comments_count, 2
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[1].id).comments_count, 1
+        )
+
+    def test_bulk_comments_reject_missing_posts(self):
+        response = self.client.post(
+            reverse("social_media:comment-create-many"),
+            {
+                "comments": [
+                    {"post": self.posts[0].id, "text": "Kept out"},
+                    {"post": self.posts[2].id + 100, "text": "Missing"},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Comment.objects.exists())
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_bulk_like_and_unlike(self):
+        ids = [post.id for post in self.posts]
+        response = self.client.post(
+            reverse("social_media:post-like-many"),
+            {"posts": ids},
+            format="json",
+        )
+        self.assertEqual(
+            response.data["liked"], [self.posts[0].id, self.posts[2].id]
+        )
+        self.assertEqual(
+            sorted(Post.objects.values_list("likes_count", flat=True)),
+            [1, 1, 1],
+        )
+
+        response = self.client.post(
+            reverse("social_media:post-unlike-many"),
+            {"posts": ids[:2]},
+            format="json",
+        )
+        self.assertEqual(response.data["unliked"], ids[:2])
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[2].id).likes_count, 1
+        )
+        self.assertEqual(Like.objects.count(), 1)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="sparse@test.com",
+            password="Test122345",
+            first_name="Sparse",
+            last_name="Tester",
+        )
+        self.client.force_authenticate(self.user)
+        self.profile = Profile.objects.create(owner=self.user)
+        other = get_user_model().objects.create_user(
+            email="followed@test.com",
+            password="Test122345",
+            first_name="Followed",
+            last_name="User",
+        )
+        self.followed = Profile.objects.create(owner=other)
+        self.profile.following.add(self.followed)
+        self.post = Post.objects.create(owner=self.user, text="Sparse")
+
+    def test_fields_limit_response_and_columns(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                POST_URL, {"author": self.user.id, "fields": "id,text"}
+            )
+
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.post.id, "text": "Sparse"}],
+        )
+
+    def test_unrequested_relations_are_not_loaded(self):
+        url = reverse("social_media:post-detail", kwargs={"pk": self.post.id})
+        with self.assertNumQueries(1):
+            # no comments preview query
+            response = self.client.get(url, {"fields": "id,likes"})
+
+        self.assertEqual(set(response.data), {"id", "likes"})
+
+    def test_expand_owner(self):
+        response = self.client.get(
+            POST_URL, {"author": self.user.id, "expand": "owner"}
+        )
+        self.assertEqual(
+            response.data["results"][0]["owner"],
+            {
+                "id": self.user.id,
+                "first_name": "Sparse",
+                "last_name": "Tester",
+            },
+        )
+
+    def test_expand_following(self):
+        url = reverse(
+            "social_media:profile-detail", kwargs={"pk": self.profile.id}
+        )
+        self.assertEqual(
+            self.client.get(url).data["following"], [self.followed.id]
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, {"fields": "id,following", "expand": "following"}
+            )
+        self.assertEqual(
+            response.data["following"][0]["first_name"], "Followed"
+        )
+        self.assertEqual(set(response.data), {"id", "following"})
+
+
+class RendererTests(TestCase):
+    def test_orjson_output_matches_json_renderer(self):
+        data = {
+            "created_at": timezone.now(),
+            "utc": datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+            "day": date(2024, 1, 2),
+            "price": Decimal("1.50"),
+            "label": gettext_lazy("Not found."),
+            1: "non-string key",
+            "separator": "a b",
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_orjson_parser(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="parser@test.com", password="Test122345"
+        )
+        client.force_authenticate(user)
+
+        response = client.post(
+            POST_URL, '{"text": "Parsed"}', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["text"], "Parsed")
+
+        response = client.post(
+            POST_URL, '{"text": ', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="async@test.com",
+            password="Test122345",
+            first_name="Async",
+            last_name="Reader",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.profile = Profile.objects.create(owner=self.user)
+        self.posts = [
+            Post.objects.create(owner=self.user, text=f"Async {number}")
+            for number in range(3)
+        ]
+        Like.objects.create(owner=self.user, post=self.posts[0])
+        Comment.objects.create(
+            owner=self.user, post=self.posts[0], text="Comment"
+        )
+
+    def assertSameResponse(self, sync_url, async_url, params=None):
+        expected = self.client.get(sync_url, params)
+        response = self.client.get(async_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Page links point at the view that was called.
+        self.assertEqual(
+            response.content.replace(async_url.encode(), sync_url.encode()),
+            expected.content,
+        )
+
+    def test_feed_matches_sync_view(self):
+        url = reverse("social_media:async-post-list")
+        self.assertSameResponse(POST_URL, url)
+        self.assertSameResponse(POST_URL, url, {"limit": 2})
+        self.assertSameResponse(
+            POST_URL, url, {"author": self.user.id, "fields": "id,owner"}
+        )
+
+    def test_post_detail_matches_sync_view(self):
+        pk = self.posts[0].id
+        self.assertSameResponse(
+            reverse("social_media:post-detail", kwargs={"pk": pk}),
+            reverse("social_media:async-post-detail", kwargs={"pk": pk}),
+        )
+
+    def test_profile_list_matches_sync_view(self):
+        self.assertSameResponse(
+            PROFILE_URL,
+            reverse("social_media:async-profile-list"),
+            {"last_name": "read"},
+        )
+
+    def test_requires_token(self):
+        response = APIClient().get(reverse("social_media:async-post-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+    async def test_served_by_async_client(self):
+        headers = {"Authorization": f"Token {self.token.key}"}
+        for name in ("async-post-list", "async-profile-list"):
+            response = await self.async_client.get(
+                reverse(f"social_media:{name}"), headers=headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = reverse(
+            "social_media:async-post-detail", kwargs={"pk": self.posts[1].id}
+        )
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["text"], "Async 1")
+
+        response = await self.async_client.get(
+            reverse("social_media:async-post-detail", kwargs={"pk": 0}),
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedDatasetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seeded_rows_and_counters_are_consistent(self):
+        counts = seed_dataset(users=40, follows_per_user=4, seed=3)
+
+        self.assertEqual(get_user_model().objects.count(), 40)
+        self.assertEqual(Profile.objects.count(), 40)
+        self.assertEqual(Post.objects.count(), counts["posts"])
+        self.assertEqual(Comment.objects.count(), counts["comments"])
+        self.assertGreater(Like.objects.count(), 0)
+        self.assertEqual(reconcile_counters(), 0)
+        self.assertTrue(TimelineEntry.objects.exists())
+
+        followers = sorted(
+            Profile.objects.values_list("followers_count", flat=True)
+        )
+        # Popularity is skewed, the most followed profile stands out.
+        self.assertGreater(followers[-1], 3 * followers[len(followers) // 2])
+
+    def test_seeding_after_deletions_numbers_past_existing_emails(self):
+        seed_dataset(users=12, seed=3)
+        get_user_model().objects.filter(email="user3@seed.test").delete()
+
+        seed_dataset(users=2, seed=4)
+
+        self.assertTrue(
+            get_user_model().objects.filter(email="user13@seed.test").exists()
+        )
+
+    def test_seeding_invalidates_cached_feeds(self):
+        user = get_user_model().objects.create_user(
+            email="viewer@test.com", password="Test122345"
+        )
+        post = Post.objects.create(owner=user, text="Drifted")
+        Post.objects.filter(pk=post.pk).update(likes_count=5)
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get(POST_URL).data["results"][0]["likes"], 5)
+
+        seed_dataset(users=5, seed=3)
+
+        self.assertEqual(client.get(POST_URL).data["results"][0]["likes"], 0)
+
+    def test_benchmark_reports_each_endpoint(self):
+        seed_dataset(users=20, seed=3)
+        comments = Comment.objects.count()
+        out = StringIO()
+        call_command(
+            "benchmark_endpoints",
+            "--endpoints",
+            "feed",
+            "post_detail",
+            "comment",
+            "--requests=5",
+            "--warmup=1",
+            "--label=test",
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["meta"]["label"], "test")
+        self.assertEqual(
+            set(report["endpoints"]), {"feed", "post_detail", "comment"}
+        )
+        for result in report["endpoints"].values():
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(
+                set(result["latency_ms"]), {"p50", "p95", "p99", "mean"}
+            )
+            self.assertGreater(result["queries_per_request"]["mean"], 0)
+        self.assertEqual(Comment.objects.count(), comments)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="metrics@test.com", password="Test122345"
+        )
+        self.client.force_authenticate(self.user)
+        Post.objects.create(owner=self.user, text="Measured")
+
+    @staticmethod
+    def sample(name, view):
+        return REGISTRY.get_sample_value(name, {"view": view}) or 0
+
+    def test_request_is_measured_by_view_action(self):
+        view = "PostViewSet.list"
+        names = (
+            "api_request_db_queries_count",
+            "api_request_db_queries_sum",
+            "api_serializer_duration_seconds_count",
+            "api_response_size_bytes_sum",
+        )
+        before = {name: self.sample(name, view) for name in names}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(POST_URL)
+
+        after = {name: self.sample(name, view) for name in names}
+        self.assertEqual(after[names[0]] - before[names[0]], 1)
+        self.assertEqual(after[names[1]] - before[names[1]], len(queries))
+        self.assertEqual(after[names[2]] - before[names[2]], 1)
+        self.assertEqual(
+            after[names[3]] - before[names[3]], len(response.content)
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get(POST_URL)
+        response = APIClient().get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'api_request_duration_seconds_count{method="GET",status="200",'
+            'view="PostViewSet.list"}',
+            response.content.decode(),
+        )
+        self.assertNotIn("celery_queue_depth", response.content.decode())
+
+    @override_settings(METRICS_TOKEN="scraper-token")
+    def test_metrics_endpoint_is_restricted(self):
+        client = APIClient(REMOTE_ADDR="10.0.0.9")
+        url = reverse("metrics")
+
+        self.assertEqual(
+            client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        response = client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = client.get(url, HTTP_AUTHORIZATION="Bearer scraper-token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TaskMetricsTests(TestCase):
+    @staticmethod
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_task_run_is_measured_and_logged(self):
+        task = reconcile_stored_counters.name
+        labels = {"task": task, "state": "SUCCESS"}
+        before = self.sample("celery_task_duration_seconds_count", **labels)
+
+        with self.assertLogs("app.task_metrics", "INFO") as logs:
+            reconcile_stored_counters.apply()
+
+        self.assertEqual(
+            self.sample("celery_task_duration_seconds_count", **labels),
+            before + 1,
+        )
+        self.assertIn(f"task={task} ", logs.output[0])
+        self.assertIn("state=SUCCESS", logs.output[0])
+        self.assertEqual(logs.records[0].task_timing["task"], task)
+
+    def test_failure_is_counted_by_exception(self):
+        labels = {
+            "task": generate_image_variants.name,
+            "exception": "LookupError",
+        }
+        before = self.sample("celery_task_failures_total", **labels)
+
+        generate_image_variants.apply(args=("social_media.Missing", 1))
+
+        self.assertEqual(
+            self.sample("celery_task_failures_total", **labels), before + 1
+        )
+
+    def test_lag_is_measured_from_eta(self):
+        eta = timezone.now() - timedelta(seconds=5)
+
+        lag = task_lag_seconds(Context(eta=eta.isoformat()))
+
+        self.assertAlmostEqual(lag, 5, delta=1)
+        self.assertIsNone(task_lag_seconds(Context()))
+
+    @staticmethod
+    def queue_depth(queue):
+        registry = CollectorRegistry()
+        registry.register(QueueDepthCollector())
+        return registry.get_sample_value(
+            "celery_queue_depth", {"queue": queue}
+        ) or 0
+
+    def test_published_payload_and_queue_depth(self):
+        labels = {"task": trim_timelines.name}
+        before = self.sample("celery_task_payload_bytes_count", **labels)
+        depth = self.queue_depth("celery")
+
+        trim_timelines.delay()
+
+        self.assertEqual(
+            self.sample("celery_task_payload_bytes_count", **labels),
+            before + 1,
+        )
+        self.assertEqual(self.queue_depth("celery"), depth + 1)
+
+    def test_queue_depth_without_broker_is_empty(self):
+        conf = current_app.conf
+        self.addCleanup(
+            setattr, conf, "broker_read_url", conf.broker_read_url
+        )
+        conf.broker_read_url = "amqp://guest@127.0.0.1:1//"
+
+        with self.assertLogs("app.task_metrics", "WARNING"):
+            (depth,) = QueueDepthCollector().collect()
+        self.assertEqual(depth.samples, [])
+
+
+class ReplicaRoutingTests(TestCase):
+    databases = {"default", *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        replica_pool.reset()
+        self.user = get_user_model().objects.create_user(
+            email="replica@test.com", password="Test122345"
+        )
+        self.post = Post.objects.create(owner=self.user, text="Replicated")
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def replica_queries(self, url):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Not the replica's own lag check.
+        return len(
+            [
+                query
+                for query in queries
+                if "pg_is_in_recovery" not in query["sql"]
+            ]
+        )
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(Post.objects.all().db, "default")
+
+    def test_pin_key_is_per_client(self):
+        request = RequestFactory().get(POST_URL, HTTP_AUTHORIZATION="Token a")
+        other = RequestFactory().get(POST_URL, HTTP_AUTHORIZATION="Token b")
+
+        self.assertIsNone(pin_key(RequestFactory().get(POST_URL)))
+        self.assertNotEqual(pin_key(request), pin_key(other))
+        self.assertNotIn("Token", pin_key(request))
+
+    @skipUnless(settings.DATABASE_REPLICAS, "Requires POSTGRES_REPLICAS")
+    def test_safe_requests_read_from_replica(self):
+        self.assertGreater(self.replica_queries(POST_URL), 0)
+
+    @skipUnless(settings.DATABASE_REPLICAS, "Requires POSTGRES_REPLICAS")
+    def test_recent_versions_are_not_cached_from_replica(self):
+        self.assertGreater(self.replica_queries(POST_URL), 0)
+        self.assertGreater(self.replica_queries(POST_URL), 0)
+
+    @skipUnless(settings.DATABASE_REPLICAS, "Requires POSTGRES_REPLICAS")
+    @override_settings(REPLICA_MAX_LAG=0)
+    def test_settled_replica_responses_are_cached(self):
+        self.assertGreater(self.replica_queries(POST_URL), 0)
+        self.assertEqual(self.replica_queries(POST_URL), 0)
+
+    @skipUnless(settings.DATABASE_REPLICAS, "Requires POSTGRES_REPLICAS")
+    def test_write_pins_client_to_primary(self):
+        response = self.client.post(
+            reverse("social_media:post-create-comment", args=[self.post.id]),
+            {"text": "Mine"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.replica_queries(POST_URL), 0)
+
+    @skipUnless(settings.DATABASE_REPLICAS, "Requires POSTGRES_REPLICAS")
+    @override_settings(REPLICA_MAX_LAG=-1, REPLICA_CHECK_INTERVAL=0)
+    def test_lagging_replica_is_skipped(self):
+        with self.assertLogs("app.db_router", "WARNING"):
+            self.assertEqual(self.replica_queries(POST_URL), 0)
@@ -0,0 +1,238 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from social_media import response_cache
+from social_media.models import Post, Profile, TimelineEntry
+
+
+def is_pull_author(profile: Profile) -> bool:
+    """Authors with too many followers are read at query time instead."""
+    return profile.followers_count > settings.TIMELINE_FANOUT_LIMIT
+
+
+def followed_owner_ids(user_id: int, pull: bool):
+    following = Profile.following.through.objects.filter(
+        from_profile__owner_id=user_id
+    ).values("to_profile_id")
+    lookup = "followers_count__gt" if pull else "followers_count__lte"
+
+    return Profile.objects.filter(
+        id__in=following, **{lookup: settings.TIMELINE_FANOUT_LIMIT}
+    ).values_list("owner_id", flat=True)
+
+
+def _add_entries(owner_ids, posts) -> None:
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=date)
+            for owner_id in owner_ids
+            for post_id, date in posts
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    invalidate_feeds(owner_ids)
+
+
+def feed_resources(owner_ids) -> list:
+    return [f"viewer:{owner_id}" for owner_id in owner_ids]
+
+
+def invalidate_feeds(owner_ids) -> None:
+    response_cache.invalidate(*feed_resources(owner_ids))
+
+
+def invalidate_post_feeds(post: Post) -> None:
+    """Feeds with the post in them, its author's and its timelines'."""
+    owner_ids = set(
+        TimelineEntry.objects.filter(post=post).values_list(
+            "owner_id", flat=True
+        )
+    )
+    invalidate_feeds(owner_ids | {post.owner_id})
+
+
+def add_own_post(post: Post) -> None:
+    """The author's entry, followers get theirs from ``fan_out_post()``."""
+    _add_entries([post.owner_id], [(post.id, post.created_at)])
+
+
+def fan_out_post(post: Post) -> None:
+    invalidate_feeds(fan_out_posts([post]))
+
+
+def fan_out_posts(posts) -> set:
+    """
+    Add the posts to their authors' timelines and those of the followers
+    of push authors with one insert, returns the owner ids of the
+    timelines, whose feeds the caller invalidates.
+    """
+    readers = {post.owner_id: {post.owner_id} for post in posts}
+    push_profiles = Profile.objects.filter(
+        owner_id__in=readers,
+        followers_count__lte=settings.TIMELINE_FANOUT_LIMIT,
+    ).values("id")
+    follows = Profile.following.through.objects.filter(
+        to_profile_id__in=push_profiles
+    ).values_list("to_profile__owner_id", "from_profile__owner_id")
+    for author_id, follower_id in follows:
+        readers[author_id].add(follower_id)
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                owner_id=owner_id, post_id=post.id, created_at=post.created_at
+            )
+            for post in posts
+            for owner_id in readers[post.owner_id]
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    return set().union(*readers.values())
+
+
+def _timeline_positions(entries):
+    return entries.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F("owner_id"),
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
+    )
+
+
+def trim_owner_timelines(owner_ids) -> None:
+    """Trim the timelines of the given users with one delete."""
+    entries = TimelineEntry.objects.filter(owner_id__in=owner_ids)
+    excess = (
+        _timeline_positions(entries)
+        .filter(position__gt=settings.TIMELINE_MAX_LENGTH)
+        .values("id")
+    )
+    TimelineEntry.objects.filter(id__in=excess).delete()
+
+
+def trim_timelines(batch_size: int = 10000) -> None:
+    excess = (
+        _timeline_positions(TimelineEntry.objects.all())
+        .filter(position__gt=settings.TIMELINE_MAX_LENGTH)
+        .values_list("id", flat=True)
+    )
+
+    while True:
+        batch = list(excess[:batch_size])
+        if not batch:
+            break
+        TimelineEntry.objects.filter(id__in=batch).delete()
+
+
+def backfill_follow(follower: Profile, followed_profiles) -> None:
+    """Copy the latest posts of newly followed profiles in one query."""
+    owner_ids = [
+        profile.owner_id
+        for profile in followed_profiles
+        if not is_pull_author(profile)
+    ]
+    if not owner_ids:
+        return
+
+    posts = (
+        Post.objects.filter(owner_id__in=owner_ids)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("owner_id"),
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(position__lte=settings.TIMELINE_BACKFILL_SIZE)
+        .values_list("id", "created_at")
+    )
+    _add_entries([follower.owner_id], posts)
+    trim_owner_timelines([follower.owner_id])
+
+
+def backfill_followers(followed: Profile, followers) -> None:
+    """``backfill_follow()`` of one profile for many followers at once."""
+    if is_pull_author(followed):
+        return
+
+    owner_ids = [follower.owner_id for follower in followers]
+    posts = (
+        Post.objects.filter(owner_id=followed.owner_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: settings.TIMELINE_BACKFILL_SIZE]
+    )
+    _add_entries(owner_ids, posts)
+    trim_owner_timelines(owner_ids)
+
+
+def remove_follow(follower: Profile, followed_profiles) -> None:
+    TimelineEntry.objects.filter(
+        owner_id=follower.owner_id,
+        post__owner_id__in=[profile.owner_id for profile in followed_profiles],
+    ).delete()
+    invalidate_feeds([follower.owner_id])
+
+
+def remove_followers(followed: Profile, followers) -> None:
+    owner_ids = [follower.owner_id for follower in followers]
+    TimelineEntry.objects.filter(
+        owner_id__in=owner_ids, post__owner_id=followed.owner_id
+    ).delete()
+    invalidate_feeds(owner_ids)
+
+
+def rebuild_timeline(user_id: int) -> None:
+    posts = (
+        Post.objects.filter(
+            Q(owner_id=user_id)
+            | Q(owner_id__in=list(followed_owner_ids(user_id, pull=False)))
+        )
+        .order_by("-created_at")
+        .values_list("id", "created_at")[: settings.TIMELINE_MAX_LENGTH]
+    )
+
+    with transaction.atomic():
+        TimelineEntry.objects.filter(owner_id=user_id).delete()
+        _add_entries([user_id], posts)
+
+
+def feed_queryset(user, queryset):
+    """
+    Posts precomputed into the user's timeline, merged with the posts of
+    followed authors that are too popular to be fanned out on write.
+    """
+    pull_owner_ids = list(followed_owner_ids(user.id, pull=True))
+    return _filter_feed(user, queryset, pull_owner_ids)
+
+
+async def afeed_queryset(user, queryset):
+    """``feed_queryset()`` that looks up the pull authors asynchronously."""
+    pull_owner_ids = [
+        owner_id async for owner_id in followed_owner_ids(user.id, pull=True)
+    ]
+    return _filter_feed(user, queryset, pull_owner_ids)
+
+
+def _filter_feed(user, queryset, pull_owner_ids):
+    """
+    Feed posts annotated with the ``feed_created_at`` and ``feed_id`` keys
+    of ``TimelinePagination``.
+    """
+    if not pull_owner_ids:
+        # Keyed on the entries themselves, a page is one range read of the
+        # (owner, -created_at, -id) timeline index.
+        return queryset.filter(timeline_entries__owner=user).annotate(
+            feed_created_at=F("timeline_entries__created_at"),
+            feed_id=F("timeline_entries__id"),
+        )
+
+    # Merged with posts that have no entry, keyed on the posts.
+    timeline = TimelineEntry.objects.filter(owner=user).values("post_id")
+    return queryset.filter(
+        Q(id__in=timeline) | Q(owner_id__in=pull_owner_ids)
+    ).annotate(feed_created_at=F("created_at"), feed_id=F("id"))
@@ -1,10 +1,18 @@
+from django.urls import path
 from rest_framework import routers
 
+from social_media.async_views import (
+    AsyncPostDetailView,
+    AsyncPostListView,
+    AsyncProfileListView,
+)
 from social_media.views import (
     ProfileViewSet,
     PostViewSet,
     CommentViewSet,
-    LikeViewSet
+    LikeViewSet,
+    HashtagViewSet,
+    ScheduledPostViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -12,9 +20,25 @@ router.register("profiles", ProfileViewSet)
 router.register("posts", PostViewSet)
 router.register("comments", CommentViewSet)
 router.register("likes", LikeViewSet)
+router.register("hashtags", HashtagViewSet)
+router.register("scheduled-posts", ScheduledPostViewSet)
 
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "async/posts/", AsyncPostListView.as_view(), name="async-post-list"
+    ),
+    path(
+        "async/posts/<int:pk>/",
+        AsyncPostDetailView.as_view(),
+        name="async-post-detail",
+    ),
+    path(
+        "async/profiles/",
+        AsyncProfileListView.as_view(),
+        name="async-profile-list",
+    ),
+]
 
 
 app_name = "social_media"
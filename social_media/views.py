@@ -1,18 +1,45 @@
-import base64
 import os
 from datetime import datetime
 import pytz
 
-from django.db.models import Q, Count, Prefetch
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from django.db import transaction
+from drf_spectacular.utils import (
+    extend_schema,
+    inline_serializer,
+    OpenApiParameter,
+)
+from rest_framework import serializers
+from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
-from rest_framework.generics import get_object_or_404
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from social_media.models import Profile, Post, Comment, Like
+from social_media import graph
+from social_media.fieldsets import optimize_view_queryset
+from social_media.filters import (
+    filter_posts,
+    filter_profiles,
+    is_filtered_post_list,
+)
+from social_media.hashtags import normalize_hashtag
+from social_media.likes import like_posts, toggle_like, unlike_posts
+from social_media.models import (
+    Profile,
+    Post,
+    Comment,
+    Like,
+    Hashtag,
+    ScheduledPost,
+)
+from social_media.pagination import (
+    KeysetPagination,
+    SearchRankPagination,
+    TimelinePagination,
+)
 from social_media.permissions import IsOwnerOrIfAuthenticatedReadOnly
+from social_media.response_cache import cache_response
+from social_media.search import search_posts
 from social_media.serializers import (
     ProfileSerializer,
     ProfileListSerializer,
@@ -22,43 +49,146 @@ from social_media.serializers import (
     PostUpdateSerializer,
     CommentSerializer,
     CommentCreateSerializer,
+    CommentDetailSerializer,
     LikeSerializer,
     LikeDetailSerializer,
+    HashtagSerializer,
+    LikeToggleSerializer,
+    BulkFollowSerializer,
+    BatchIdsSerializer,
+    BulkLikeSerializer,
+    BulkCommentSerializer,
+    RelationshipSerializer,
+    ScheduledPostSerializer,
+    RescheduleSerializer,
 )
-from social_media.tasks import create_scheduled_post
+from social_media.timeline import feed_queryset
 from dotenv import load_dotenv
 
 load_dotenv()
 
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        type=str,
+        description="Comma separated fields to return (ex. ?fields=id,text)",
+        required=False,
+    ),
+    OpenApiParameter(
+        "expand",
+        type=str,
+        description=(
+            "Comma separated fields to return as nested objects "
+            "(ex. ?expand=owner)"
+        ),
+        required=False,
+    ),
+]
+
+BATCH_IDS_PARAMETER = OpenApiParameter(
+    "ids",
+    type=int,
+    many=True,
+    description="Ids to fetch, up to 100 (ex. ?ids=3&ids=1)",
+    required=True,
+)
+
 
-class ProfileViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Profile.objects.all()
-        .select_related("owner")
-        .prefetch_related("following", "followers")
+def batch_response_schema(name, serializer_class):
+    return inline_serializer(
+        name,
+        fields={
+            "results": serializer_class(many=True),
+            "missing": serializers.ListField(
+                child=serializers.IntegerField()
+            ),
+        },
     )
+
+
+class BatchRetrieveMixin:
+    """
+    Fetch many objects by id with a single query, in the order requested.
+    Ids that do not exist, or are filtered out by the queryset, are
+    reported as ``missing``.
+    """
+
+    def batch_response(self, request):
+        serializer = BatchIdsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+
+        found = self.get_queryset().in_bulk(ids)
+        objects = [found[pk] for pk in ids if pk in found]
+        self.check_batch_permissions(request, objects)
+
+        serializer = self.get_serializer(objects, many=True)
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in found],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def check_batch_permissions(self, request, objects):
+        """
+        Object permissions evaluated once for the whole batch, falling back
+        to one check per object for permissions without
+        ``has_batch_permission``.
+        """
+        for permission in self.get_permissions():
+            if hasattr(permission, "has_batch_permission"):
+                allowed = permission.has_batch_permission(
+                    request, self, objects
+                )
+            else:
+                allowed = all(
+                    permission.has_object_permission(request, self, obj)
+                    for obj in objects
+                )
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+
+class ProfileViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
+    queryset = Profile.objects.all().select_related("owner")
     serializer_class = ProfileSerializer
     permission_classes = (IsAuthenticated, IsOwnerOrIfAuthenticatedReadOnly)
+    throttle_scopes = {
+        "follow": "follow",
+        "unfollow": "follow",
+        "bulk_follow": "follow",
+    }
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = filter_profiles(self.queryset, self.request.query_params)
 
-        last_name = self.request.query_params.get("last_name")
-        first_name = self.request.query_params.get("first_name")
-        if last_name:
-            queryset = queryset.filter(owner__last_name__icontains=last_name)
-        if first_name:
-            queryset = queryset.filter(owner__first_name__icontains=first_name)
+        if self.action in ("retrieve", "update", "partial_update"):
+            queryset = queryset.prefetch_related("following")
 
-        return queryset.distinct()
+        return optimize_view_queryset(self, queryset)
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "batch"):
             return ProfileListSerializer
         if self.action == "upload_image":
             return ProfileImageSerializer
+        if self.action == "bulk_follow":
+            return BulkFollowSerializer
+        if self.action == "relationship":
+            return RelationshipSerializer
         return ProfileSerializer
 
+    def get_cache_resources(self):
+        if self.action == "retrieve":
+            return [f"profile:{self.kwargs['pk']}"]
+        return ["profiles"]
+
     def perform_create(self, serializer):
         owner = self.request.user
         owner.first_name = self.request.data.get("owner.first_name")
@@ -79,46 +209,94 @@ class ProfileViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    @action(methods=["GET"], detail=True)
+    @extend_schema(request=None)
+    @action(
+        methods=["POST"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
     def follow(self, request, pk=None):
         profile_to_follow = self.get_object()
+        profile = self.request.user.profile
 
-        if self.request.user.profile == profile_to_follow:
+        if profile == profile_to_follow:
             return Response(
                 {"detail": "You cannot follow yourself."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if profile_to_follow in self.request.user.profile.following.all():
+        if not graph.follow(profile, [profile_to_follow.id]):
             return Response(
                 {"detail": "You are already following this user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        self.request.user.profile.following.add(profile_to_follow)
         return Response(
             {"detail": "You are now following this user."},
             status=status.HTTP_200_OK,
         )
 
-    @action(methods=["GET"], detail=True)
+    @extend_schema(request=None)
+    @action(
+        methods=["POST"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
     def unfollow(self, request, pk=None):
         profile_to_unfollow = self.get_object()
 
-        if not self.request.user.profile.following.filter(
-            id=profile_to_unfollow.id
-        ).exists():
+        if not graph.unfollow(
+            self.request.user.profile, [profile_to_unfollow.id]
+        ):
             return Response(
                 {"detail": "You are not unfollow this user."},
                 status=status.HTTP_200_OK,
             )
 
-        self.request.user.profile.following.remove(profile_to_unfollow)
         return Response(
             {"detail": "You have unfollowed this user"},
             status=status.HTTP_200_OK,
         )
 
+    @action(methods=["POST"], detail=False, url_path="bulk-follow")
+    def bulk_follow(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        followed = graph.follow(
+            self.request.user.profile, serializer.validated_data["profiles"]
+        )
+        return Response(
+            {"followed": sorted(followed)}, status=status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        parameters=[BATCH_IDS_PARAMETER, *FIELDS_PARAMETERS],
+        responses=batch_response_schema(
+            "ProfileBatch", ProfileListSerializer
+        ),
+    )
+    @action(methods=["GET"], detail=False)
+    def batch(self, request):
+        return self.batch_response(request)
+
+    @action(methods=["GET"], detail=True)
+    def relationship(self, request, pk=None):
+        try:
+            profile_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        if not Profile.objects.filter(pk=profile_id).exists():
+            raise NotFound()
+        own_id = self.request.user.profile.id
+        serializer = self.get_serializer(
+            {
+                "following": graph.is_following(own_id, profile_id),
+                "followed_by": graph.is_following(profile_id, own_id),
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -133,64 +311,113 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 description="Filter by first_name",
                 required=False,
             ),
+            OpenApiParameter(
+                "search",
+                type=str,
+                description=(
+                    "Fuzzy search by first and last name, "
+                    "ordered by similarity (ex. ?search=jon do)"
+                ),
+                required=False,
+            ),
+            OpenApiParameter(
+                "autocomplete",
+                type=str,
+                description=(
+                    "Type-ahead search, every term must prefix the first "
+                    "or last name (ex. ?autocomplete=jo d)"
+                ),
+                required=False,
+            ),
+            *FIELDS_PARAMETERS,
         ]
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELDS_PARAMETERS)
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Post.objects.all().select_related("owner").prefetch_related("likes")
-    )
+
+class PostViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all().select_related("owner")
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated, IsOwnerOrIfAuthenticatedReadOnly)
+    throttle_scopes = {
+        "create": "post_create",
+        "like": "like",
+        "like_many": "like",
+        "unlike_many": "like",
+    }
+
+    def is_feed(self) -> bool:
+        return self.action == "list" and not is_filtered_post_list(
+            self.request.query_params
+        )
 
-    @staticmethod
-    def image_decoding(file):
-        image = file.read()
-        byte = base64.b64encode(image)
-        data_image = {"image": byte.decode("utf-8"), "name": file.name}
-        return data_image
+    @property
+    def paginator(self):
+        if self.is_feed():
+            self.pagination_class = TimelinePagination
+        return super().paginator
 
     def get_queryset(self):
-        queryset = self.queryset
-
-        author_id_str = self.request.query_params.get("author")
-        hashtag = self.request.query_params.get("hashtag")
-        if author_id_str or hashtag:
-            if author_id_str:
-                queryset = queryset.filter(owner_id=int(author_id_str))
-
-            if hashtag:
-                queryset = queryset.filter(hashtag__icontains=hashtag)
-            return queryset.distinct()
-
-        if self.action == "list":
-            queryset = self.queryset.filter(
-                Q(owner__profile__followers=self.request.user.profile)
-                | Q(owner__profile=self.request.user.profile)
-            ).order_by("-created_at")
-        queryset = queryset.annotate(comments_count=Count("comments"))
-
-        queryset = queryset.prefetch_related(
-            Prefetch(
-                "comments",
-                queryset=Comment.objects.all().select_related("owner"),
-            )
-        )
+        params = self.request.query_params
+        if is_filtered_post_list(params):
+            queryset = filter_posts(self.queryset, params)
+        elif self.action == "list":
+            queryset = feed_queryset(self.request.user, self.queryset)
+        else:
+            queryset = self.queryset
 
-        return queryset.distinct()
+        return optimize_view_queryset(self, queryset)
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search", "batch"):
             return PostListSerializer
+        if self.action in ("like_many", "unlike_many"):
+            return BulkLikeSerializer
         if self.action == "update":
             return PostUpdateSerializer
         if self.action == "create_comment":
             return CommentSerializer
+        if self.action == "comments":
+            return CommentDetailSerializer
+        if self.action == "likes":
+            return LikeDetailSerializer
         return PostSerializer
 
+    def get_cache_resources(self):
+        if self.action in ("retrieve", "comments", "likes"):
+            return [f"post:{self.kwargs['pk']}"]
+
+        # Lists show liked_by_me, feeds are versioned per viewer.
+        viewer = f"viewer:{self.request.user.id}"
+        if self.is_feed():
+            return [viewer]
+        return ["posts", viewer]
+
+    def post_related_response(self, model):
+        """A page of the comments or likes of the post in the URL."""
+        try:
+            post_id = int(self.kwargs["pk"])
+        except ValueError:
+            raise NotFound()
+
+        queryset = model.objects.filter(post_id=post_id)
+        page = self.paginate_queryset(queryset.select_related("owner"))
+        # They are deleted with their post, so only an empty page can
+        # belong to a missing one.
+        if not page and not Post.objects.filter(pk=post_id).exists():
+            raise NotFound()
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         scheduled_time_str = request.data.get("scheduled_time")
         if scheduled_time_str:
@@ -207,22 +434,24 @@ class PostViewSet(viewsets.ModelViewSet):
                     serializer.data, status=status.HTTP_201_CREATED
                 )
             else:
-                data_image = None
-                request = request.data.copy()
-
-                if request.get("image"):
-                    data_image = self.image_decoding(
-                        self.request.FILES["image"]
-                    )
-                    request.pop("image")
-
                 tz = pytz.timezone(os.environ["TZ"])
-                create_scheduled_post.apply_async(
-                    args=[self.request.user.id, request, data_image],
-                    eta=tz.localize(scheduled_time_datetime),
+                data = {
+                    field: request.data[field]
+                    for field in ("text", "hashtag", "image")
+                    if field in request.data
+                }
+                data["publish_at"] = tz.localize(scheduled_time_datetime)
+
+                serializer = ScheduledPostSerializer(
+                    data=data, context=self.get_serializer_context()
                 )
+                serializer.is_valid(raise_exception=True)
+                serializer.save(owner=self.request.user)
                 return Response(
-                    {"status": "Post will be created at scheduled time."},
+                    {
+                        "status": "Post will be created at scheduled time.",
+                        "scheduled_post": serializer.data,
+                    },
                     status=status.HTTP_202_ACCEPTED,
                 )
         else:
@@ -239,6 +468,7 @@ class PostViewSet(viewsets.ModelViewSet):
         url_path="create_comment",
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic
     def create_comment(self, request, pk=None):
         post = self.get_object()
         serializer = CommentSerializer(data=request.data)
@@ -246,6 +476,123 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer.save(owner=self.request.user, post=post)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["GET"])
+    @cache_response
+    def comments(self, request, pk=None):
+        return self.post_related_response(Comment)
+
+    @action(detail=True, methods=["GET"])
+    @cache_response
+    def likes(self, request, pk=None):
+        return self.post_related_response(Like)
+
+    @extend_schema(request=None, responses=LikeToggleSerializer)
+    @action(detail=True, methods=["POST"])
+    def like(self, request, pk=None):
+        try:
+            result = toggle_like(request.user.id, int(pk))
+        except ValueError:
+            result = None
+
+        if result is None:
+            return Response(
+                {"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        liked, likes_count = result
+        serializer = LikeToggleSerializer(
+            {"liked": liked, "likes_count": likes_count}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[BATCH_IDS_PARAMETER, *FIELDS_PARAMETERS],
+        responses=batch_response_schema("PostBatch", PostListSerializer),
+    )
+    @action(detail=False, methods=["GET"])
+    def batch(self, request):
+        return self.batch_response(request)
+
+    @extend_schema(
+        responses=inline_serializer(
+            "BulkLikeResult",
+            fields={
+                "liked": serializers.ListField(
+                    child=serializers.IntegerField()
+                )
+            },
+        )
+    )
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="bulk-like",
+        permission_classes=[IsAuthenticated],
+    )
+    def like_many(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        liked = like_posts(request.user.id, serializer.validated_data["posts"])
+        return Response({"liked": sorted(liked)}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        responses=inline_serializer(
+            "BulkUnlikeResult",
+            fields={
+                "unliked": serializers.ListField(
+                    child=serializers.IntegerField()
+                )
+            },
+        )
+    )
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="bulk-unlike",
+        permission_classes=[IsAuthenticated],
+    )
+    def unlike_many(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        unliked = unlike_posts(
+            request.user.id, serializer.validated_data["posts"]
+        )
+        return Response(
+            {"unliked": sorted(unliked)}, status=status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=str,
+                description="Full-text search query (ex. ?q=django -flask)",
+                required=True,
+            ),
+            *FIELDS_PARAMETERS,
+        ]
+    )
+    @action(
+        detail=False,
+        methods=["GET"],
+        pagination_class=SearchRankPagination,
+    )
+    @cache_response
+    def search(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"detail": "The q query parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = search_posts(self.get_queryset(), text)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -257,43 +604,180 @@ class PostViewSet(viewsets.ModelViewSet):
             OpenApiParameter(
                 "hashtag",
                 type=str,
-                description="Filter by hashtag",
+                description=(
+                    "Filter by hashtag (ex. ?hashtag=django), "
+                    "a trailing * matches by prefix (ex. ?hashtag=dj*)"
+                ),
                 required=False,
             ),
+            *FIELDS_PARAMETERS,
         ]
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELDS_PARAMETERS)
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated, IsOwnerOrIfAuthenticatedReadOnly)
 
     def get_serializer_class(self):
         if self.action in ["retrieve", "update", "destroy"]:
             return CommentSerializer
+        if self.action == "create_many":
+            return BulkCommentSerializer
         return CommentCreateSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @extend_schema(responses=CommentCreateSerializer(many=True))
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="bulk",
+        permission_classes=[IsAuthenticated],
+    )
+    @transaction.atomic
+    def create_many(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        comments = serializer.save(owner=self.request.user)
+        return Response(
+            CommentCreateSerializer(comments, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
 
-class LikeViewSet(viewsets.ModelViewSet):
+class LikeViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    # No update: moving a like to another post would bypass the counters
+    # and the unique constraint, unlike and like instead.
     queryset = Like.objects.all().select_related("owner", "post")
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated, IsOwnerOrIfAuthenticatedReadOnly)
+    throttle_scopes = {"create": "like"}
 
     def get_serializer_class(self):
         if self.action == "list":
             return LikeDetailSerializer
         return LikeSerializer
 
-    def perform_create(self, serializer):
-        post = get_object_or_404(Post, pk=self.request.data["post"])
-        user = self.request.user
+    @extend_schema(responses=LikeToggleSerializer)
+    def create(self, request, *args, **kwargs):
+        # The same single statement as PostViewSet.like, concurrent toggles
+        # of one like cannot hit the unique constraint.
+        try:
+            result = toggle_like(request.user.id, int(request.data["post"]))
+        except (KeyError, TypeError, ValueError):
+            result = None
+
+        if result is None:
+            return Response(
+                {"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND
+            )
 
-        likes = Like.objects.filter(owner=user, post=post)
-        if likes:
-            likes.delete()
-        else:
-            serializer.save(owner=user, post=post)
+        liked, likes_count = result
+        serializer = LikeToggleSerializer(
+            {"liked": liked, "likes_count": likes_count}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class HashtagViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    queryset = Hashtag.objects.all()
+    serializer_class = HashtagSerializer
+    pagination_class = None
+    permission_classes = (IsAuthenticated,)
+    autocomplete_limit = 10
+
+    def get_queryset(self):
+        queryset = self.queryset
+
+        prefix = normalize_hashtag(self.request.query_params.get("q", ""))
+        if prefix:
+            queryset = queryset.filter(name__startswith=prefix)
+
+        return queryset[: self.autocomplete_limit]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=str,
+                description="Hashtag prefix to autocomplete (ex. ?q=dja)",
+                required=False,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class ScheduledPostViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = ScheduledPost.objects.all()
+    permission_classes = (IsAuthenticated,)
+    already_published_message = "The post has already been published."
+
+    def get_queryset(self):
+        return self.queryset.filter(owner=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "reschedule":
+            return RescheduleSerializer
+        return ScheduledPostSerializer
+
+    def destroy(self, request, *args, **kwargs):
+        scheduled_post = self.get_object()
+
+        # The row is gone if the dispatcher published it in the meantime.
+        deleted, _ = self.get_queryset().filter(pk=scheduled_post.pk).delete()
+        if not deleted:
+            return Response(
+                {"detail": self.already_published_message},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if scheduled_post.image:
+            scheduled_post.image.delete(save=False)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(responses=ScheduledPostSerializer)
+    @action(detail=True, methods=["POST"])
+    def reschedule(self, request, pk=None):
+        scheduled_post = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        publish_at = serializer.validated_data["publish_at"]
+
+        if not self.get_queryset().filter(pk=scheduled_post.pk).update(
+            publish_at=publish_at
+        ):
+            return Response(
+                {"detail": self.already_published_message},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        scheduled_post.publish_at = publish_at
+        serializer = ScheduledPostSerializer(
+            scheduled_post, context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
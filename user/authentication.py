@@ -0,0 +1,221 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+CACHE_KEY_PREFIX = "auth-token"
+REVOKED_KEY_PREFIX = "auth-token-revoked"
+
+
+def _cache_key(key: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:{key}"
+
+
+def _revoked_key(key: str) -> str:
+    return f"{REVOKED_KEY_PREFIX}:{key}"
+
+
+def _tiers():
+    """The per-process cache first, then the cache shared by all workers."""
+    return [
+        (
+            caches[settings.TOKEN_LOCAL_CACHE_ALIAS],
+            settings.TOKEN_LOCAL_CACHE_TIMEOUT,
+        ),
+        (caches[settings.TOKEN_CACHE_ALIAS], settings.TOKEN_CACHE_TIMEOUT),
+    ]
+
+
+def token_expires_at(created):
+    if not settings.TOKEN_EXPIRE_SECONDS:
+        return None
+    return created + timedelta(seconds=settings.TOKEN_EXPIRE_SECONDS)
+
+
+def is_token_expired(token: Token) -> bool:
+    expires_at = token_expires_at(token.created)
+    return expires_at is not None and expires_at <= timezone.now()
+
+
+def get_cached_token(key: str):
+    missed = []
+    for index, (cache, timeout) in enumerate(_tiers()):
+        if not timeout:
+            continue
+        token = cache.get(_cache_key(key))
+        # Another process may have revoked a local copy.
+        if index == 0 and token is not None and is_revoked(key):
+            token = None
+        if token is not None:
+            for cache, timeout in missed:
+                cache.set(_cache_key(key), token, timeout)
+            return token
+        missed.append((cache, timeout))
+    return None
+
+
+async def aget_cached_token(key: str):
+    missed = []
+    for index, (cache, timeout) in enumerate(_tiers()):
+        if not timeout:
+            continue
+        token = await cache.aget(_cache_key(key))
+        # Another process may have revoked a local copy.
+        if index == 0 and token is not None and await ais_revoked(key):
+            token = None
+        if token is not None:
+            for cache, timeout in missed:
+                await cache.aset(_cache_key(key), token, timeout)
+            return token
+        missed.append((cache, timeout))
+    return None
+
+
+def is_revoked(key: str) -> bool:
+    """
+    Whether the token was invalidated within ``TOKEN_LOCAL_CACHE_TIMEOUT``,
+    other processes may still hold a local copy of it.
+    """
+    shared = caches[settings.TOKEN_CACHE_ALIAS]
+    return shared.get(_revoked_key(key)) is not None
+
+
+async def ais_revoked(key: str) -> bool:
+    shared = caches[settings.TOKEN_CACHE_ALIAS]
+    return await shared.aget(_revoked_key(key)) is not None
+
+
+def _token_timeouts(token: Token):
+    expires_at = token_expires_at(token.created)
+    for cache, timeout in _tiers():
+        if expires_at is not None:
+            lifetime = (expires_at - timezone.now()).total_seconds()
+            timeout = min(timeout, int(lifetime))
+        if timeout > 0:
+            yield cache, timeout
+
+
+def cache_token(token: Token) -> None:
+    for cache, timeout in _token_timeouts(token):
+        cache.set(_cache_key(token.key), token, timeout)
+
+
+async def acache_token(token: Token) -> None:
+    for cache, timeout in _token_timeouts(token):
+        await cache.aset(_cache_key(token.key), token, timeout)
+
+
+def invalidate_tokens(*keys) -> None:
+    """
+    Drop tokens from both tiers, after commit as well so a concurrent
+    request cannot put back the old row.
+
+    Other processes cannot reach into each other's local cache: the keys
+    are marked revoked in the shared cache for as long as a local copy
+    lives, and local hits of marked keys are not trusted.
+    """
+    if not keys:
+        return
+
+    def invalidate():
+        for cache, _timeout in _tiers():
+            cache.delete_many([_cache_key(key) for key in keys])
+        if settings.TOKEN_LOCAL_CACHE_TIMEOUT:
+            caches[settings.TOKEN_CACHE_ALIAS].set_many(
+                {_revoked_key(key): True for key in keys},
+                settings.TOKEN_LOCAL_CACHE_TIMEOUT,
+            )
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def rotate_token(user) -> Token:
+    """Replace the token of the user with a new key."""
+    with transaction.atomic():
+        Token.objects.filter(user=user).delete()
+        return Token.objects.create(user=user)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves the token and its user from a
+    short-lived cache before querying the database, and rejects tokens
+    older than ``TOKEN_EXPIRE_SECONDS``.
+    """
+
+    def authenticate_credentials(self, key):
+        token = get_cached_token(key)
+        if token is None:
+            try:
+                token = (
+                    self.get_model()
+                    .objects.select_related("user")
+                    .get(key=key)
+                )
+            except self.get_model().DoesNotExist:
+                raise AuthenticationFailed(_("Invalid token."))
+            cache_token(token)
+
+        return self.check_token(token)
+
+    async def aauthenticate(self, request):
+        """``authenticate()`` for async views, on a Django request."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+        if len(auth) > 2:
+            raise AuthenticationFailed(
+                _(
+                    "Invalid token header. "
+                    "Token string should not contain spaces."
+                )
+            )
+
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(
+                _(
+                    "Invalid token header. "
+                    "Token string should not contain invalid characters."
+                )
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        token = await aget_cached_token(key)
+        if token is None:
+            try:
+                token = await (
+                    self.get_model()
+                    .objects.select_related("user")
+                    .aget(key=key)
+                )
+            except self.get_model().DoesNotExist:
+                raise AuthenticationFailed(_("Invalid token."))
+            await acache_token(token)
+
+        return self.check_token(token)
+
+    def check_token(self, token):
+        if not token.user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+
+        if is_token_expired(token):
+            raise AuthenticationFailed(_("Token has expired."))
+
+        return token.user, token
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:53
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "first_name", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="user_first_name_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "last_name", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="user_last_name_trgm_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Cast, Upper
 from django.utils.translation import gettext as _
 
 
@@ -49,3 +51,23 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        # Match the UPPER(name::text) expression used by icontains and
+        # istartswith lookups so they, and trigram similarity, use the index.
+        indexes = [
+            GinIndex(
+                OpClass(
+                    Upper(Cast("first_name", models.TextField())),
+                    name="gin_trgm_ops",
+                ),
+                name="user_first_name_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(
+                    Upper(Cast("last_name", models.TextField())),
+                    name="gin_trgm_ops",
+                ),
+                name="user_last_name_trgm_idx",
+            ),
+        ]
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, update_fields, **kwargs):
+    # Covers deactivation and password changes, cached tokens carry the
+    # user row.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+
+    invalidate_tokens(
+        *Token.objects.filter(user=instance).values_list("key", flat=True)
+    )
@@ -1,3 +1,134 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import CACHE_KEY_PREFIX
+
+ME_URL = reverse("user:profile")
+LOGIN_URL = reverse("user:login")
+LOGOUT_URL = reverse("user:logout")
+ROTATE_URL = reverse("user:token-rotate")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        for alias in ("default", "local"):
+            caches[alias].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="token@test.com", password="Test122345"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_the_database(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(ME_URL)
+        self.assertEqual(response.data["email"], "token@test.com")
+
+    def test_logout_invalidates_cached_token(self):
+        self.client.get(ME_URL)
+        self.assertEqual(self.client.get(LOGOUT_URL).status_code, 200)
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_revocation_is_seen_through_other_local_copies(self):
+        self.client.get(ME_URL)
+        local_key = f"{CACHE_KEY_PREFIX}:{self.token.key}"
+        local_copy = caches["local"].get(local_key)
+
+        self.token.delete()
+        # Still held by another process.
+        caches["local"].set(local_key, local_copy, 60)
+
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_deactivation_invalidates_cached_token(self):
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_password_change_refreshes_cached_user(self):
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {"password": "Changed12345"})
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_rotation_replaces_the_key(self):
+        self.client.get(ME_URL)
+        response = self.client.post(ROTATE_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["token"], self.token.key)
+
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {response.data['token']}"
+        )
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    @override_settings(TOKEN_EXPIRE_SECONDS=60)
+    def test_expired_token_is_rejected_and_replaced_on_login(self):
+        Token.objects.filter(pk=self.token.pk).update(
+            created=timezone.now() - timedelta(minutes=2)
+        )
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+        response = APIClient().post(
+            LOGIN_URL, {"email": "token@test.com", "password": "Test122345"}
+        )
+        self.assertNotEqual(response.data["token"], self.token.key)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            email="throttled@test.com", password="Test122345"
+        )
+
+    def login(self):
+        return self.client.post(
+            LOGIN_URL, {"email": "throttled@test.com", "password": "wrong"}
+        )
+
+    def test_login_scope_limits_attempts(self):
+        labels = {"view": "CreateTokenView.post", "scope": "login"}
+        rejected = (
+            REGISTRY.get_sample_value("api_throttled_requests_total", labels)
+            or 0
+        )
+        for attempt in range(10):
+            response = self.login()
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["RateLimit-Limit"], "10")
+            self.assertEqual(response["RateLimit-Remaining"], str(9 - attempt))
+
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", response)
+        self.assertEqual(
+            REGISTRY.get_sample_value("api_throttled_requests_total", labels),
+            rejected + 1,
+        )
@@ -5,12 +5,14 @@ from user.views import (
     CreateTokenView,
     ManageUserView,
     DeleteTokenView,
+    RotateTokenView,
 )
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="register"),
     path("login/", CreateTokenView.as_view(), name="login"),
     path("logout/", DeleteTokenView.as_view(), name="logout"),
+    path("token/rotate/", RotateTokenView.as_view(), name="token-rotate"),
     path("me/", ManageUserView.as_view(), name="profile"),
 ]
 
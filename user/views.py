@@ -1,25 +1,60 @@
-from rest_framework import generics, status
-from rest_framework.authentication import TokenAuthentication
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import generics, serializers, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from user.authentication import (
+    CachedTokenAuthentication,
+    is_token_expired,
+    rotate_token,
+)
 from user.serializers import UserSerializer, AuthTokenSerializer
 
+TokenResponseSerializer = inline_serializer(
+    "TokenResponse", fields={"token": serializers.CharField()}
+)
+
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_scope = "register"
 
 
 class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
+    # ObtainAuthToken disables throttling.
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = "login"
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and is_token_expired(token):
+            token = rotate_token(user)
+        return Response({"token": token.key})
+
+
+class RotateTokenView(APIView):
+    """Replace the current token with a new one, the old key stops working."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=None, responses=TokenResponseSerializer)
+    def post(self, request):
+        token = rotate_token(request.user)
+        return Response({"token": token.key}, status=status.HTTP_200_OK)
 
 
 class DeleteTokenView(APIView):
-    parser_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
@@ -37,7 +72,7 @@ class DeleteTokenView(APIView):
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):